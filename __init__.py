@@ -28,11 +28,26 @@ def unregister_module(c):
 
 if "bpy" not in locals():
     from . import material_decal_property
+    from . import material_decal_stats
+    from . import material_decal_fingerprint
+    from . import material_decal_node_clone
+    from . import material_decal_graph
+    from . import material_decal_spatial
+    from . import material_decal_index
+    from . import material_decal_atlas
+    from . import material_decal_preview
+    from . import material_decal_complexity
+    from . import material_decal_mesh
+    from . import material_decal_gc
     from . import material_decal_node_generator
     from . import material_decal_localization
     from . import material_decal_material
     from . import material_decal_projector
     from . import material_decal_channel
+    from . import material_decal_manifest
+    from . import material_decal_pipeline
+    from . import material_decal_update
+    from . import material_decal_bake
 else:
     import importlib
 
@@ -41,6 +56,28 @@ else:
 
     if "material_decal_properties" in locals():
         reload(material_decal_property)
+    if "material_decal_stats" in locals():
+        reload(material_decal_stats)
+    if "material_decal_fingerprint" in locals():
+        reload(material_decal_fingerprint)
+    if "material_decal_node_clone" in locals():
+        reload(material_decal_node_clone)
+    if "material_decal_graph" in locals():
+        reload(material_decal_graph)
+    if "material_decal_spatial" in locals():
+        reload(material_decal_spatial)
+    if "material_decal_index" in locals():
+        reload(material_decal_index)
+    if "material_decal_atlas" in locals():
+        reload(material_decal_atlas)
+    if "material_decal_preview" in locals():
+        reload(material_decal_preview)
+    if "material_decal_complexity" in locals():
+        reload(material_decal_complexity)
+    if "material_decal_mesh" in locals():
+        reload(material_decal_mesh)
+    if "material_decal_gc" in locals():
+        reload(material_decal_gc)
     if "material_decal_node_generator" in locals():
         reload(material_decal_node_generator)
     if "material_decal_localization" in locals():
@@ -51,14 +88,37 @@ else:
         reload(material_decal_projector)
     if "material_decal_channel" in locals():
         reload(material_decal_channel)
+    if "material_decal_manifest" in locals():
+        reload(material_decal_manifest)
+    if "material_decal_pipeline" in locals():
+        reload(material_decal_pipeline)
+    if "material_decal_update" in locals():
+        reload(material_decal_update)
+    if "material_decal_bake" in locals():
+        reload(material_decal_bake)
 
 modules = [
     material_decal_property,
+    material_decal_stats,
+    material_decal_fingerprint,
+    material_decal_node_clone,
+    material_decal_graph,
+    material_decal_spatial,
+    material_decal_index,
+    material_decal_atlas,
+    material_decal_preview,
+    material_decal_complexity,
+    material_decal_mesh,
+    material_decal_gc,
     material_decal_node_generator,
     material_decal_localization,
     material_decal_material,
     material_decal_projector,
-    material_decal_channel
+    material_decal_channel,
+    material_decal_manifest,
+    material_decal_pipeline,
+    material_decal_update,
+    material_decal_bake,
 ]
 
 
@@ -0,0 +1,253 @@
+# headless benchmark of decal group generation, run with:
+#   blender --background --factory-startup --python benchmarks/benchmark_generation.py -- [options]
+# results are written as json. with --baseline, metrics worse than the baseline by more than
+# the tolerance are reported and the process exits with code 1
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# metrics compared against the baseline, lower is better for all of them
+COMPARED_METRICS = [
+    "generate_full_median",
+    "generate_incremental_median",
+    "generate_noop_median",
+    "handler_ignored_median",
+    "python_peak_memory",
+    "node_count",
+    "link_count",
+]
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="material decals generation benchmark")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--projectors", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=10, help="nodes per decal material")
+    parser.add_argument("--materials", type=int, default=8, help="distinct decal materials")
+    parser.add_argument("--receivers", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--share-material-groups", action="store_true")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location("material_decal", os.path.join(ADDON_DIR, "__init__.py"),
+                                                  submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["material_decal"] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+
+def create_decal_material(name: str, node_count: int, channel_type: str):
+    material = bpy.data.materials.new(name)
+    material.use_nodes = True
+    node_tree = material.node_tree
+    node_tree.nodes.clear()
+
+    decal_input = node_tree.nodes.new("ShaderNodeGroup")
+    decal_input.node_tree = bpy.data.node_groups[".__DecalInput"]
+
+    # a chain of vector math nodes standing in for texture lookups
+    prev = decal_input.outputs[0]
+    for i in range(max(node_count - 3, 0)):
+        node = node_tree.nodes.new("ShaderNodeVectorMath")
+        node.operation = "MULTIPLY" if i % 2 == 0 else "ADD"
+        node.inputs[1].default_value = (1.0 + i * 0.01, 1.0, 1.0)
+        node_tree.links.new(prev, node.inputs[0])
+        prev = node.outputs[0]
+
+    if channel_type == "SHADER":
+        bsdf = node_tree.nodes.new("ShaderNodeBsdfPrincipled")
+        node_tree.links.new(prev, bsdf.inputs["Base Color"])
+        prev = bsdf.outputs[0]
+    else:
+        separate = node_tree.nodes.new("ShaderNodeSeparateXYZ")
+        node_tree.links.new(prev, separate.inputs[0])
+        combine = node_tree.nodes.new("ShaderNodeCombineColor")
+        node_tree.links.new(separate.outputs[0], combine.inputs[0])
+        prev = combine.outputs[0]
+
+    decal_output = node_tree.nodes.new("ShaderNodeGroup")
+    decal_output.node_tree = bpy.data.node_groups[".__DecalOutput"]
+    node_tree.links.new(prev, decal_output.inputs["Output"])
+    return material
+
+
+def create_scene(addon, args):
+    generator = addon.material_decal_node_generator
+    props = addon.material_decal_property
+    generator.ensure_predefined_node_groups_exists()
+
+    channels = props.get_decal_channels_props()
+    channels.share_material_groups = args.share_material_groups
+    channel_names = []
+    for i in range(args.channels):
+        channel = channels.decal_channels.add()
+        channel.name = f"Channel {i}"
+        channel.type = "SHADER" if i % 2 == 0 else "RGBA"
+        channel_names.append(channel.name)
+
+    materials = {}
+    for channel_type in ["SHADER", "RGBA"]:
+        materials[channel_type] = [create_decal_material(f"Decal {channel_type} {i}", args.nodes, channel_type)
+                                   for i in range(args.materials)]
+
+    projectors = []
+    for i in range(args.projectors):
+        projector = bpy.data.objects.new(f"Projector {i}", None)
+        projector.empty_display_type = "CUBE" if i % 3 else "SPHERE"
+        projector.location = (i % 10 * 3, i // 10 * 3, 0)
+        bpy.context.scene.collection.objects.link(projector)
+        channel_name = channel_names[i % len(channel_names)]
+        target = props.get_decal_projector_props(projector).targets.add()
+        target.name = channel_name
+        target.material = materials[channels.decal_channels[channel_name].type][i % args.materials]
+        target.fade_out = 0.5 if i % 2 else 0
+        projectors.append(projector)
+
+    receivers = []
+    for i in range(args.receivers):
+        mesh = bpy.data.meshes.new(f"Receiver {i}")
+        mesh.from_pydata([(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)], [], [(0, 1, 2, 3)])
+        receiver = bpy.data.objects.new(f"Receiver {i}", mesh)
+        receiver.location = (i % 4 * 8, i // 4 * 8, 0)
+        receiver.scale = (4, 4, 1)
+        bpy.context.scene.collection.objects.link(receiver)
+        material = bpy.data.materials.new(f"Receiver {i}")
+        material.use_nodes = True
+        mesh.materials.append(material)
+        receivers.append(receiver)
+
+    # setup edits queue regenerations, which are measured explicitly below instead
+    addon.material_decal_update.cancel_pending_regeneration()
+    return projectors, receivers
+
+
+def time_call(function, repeat: int) -> list[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def measure_handler(addon, receivers, projectors, repeat: int) -> list[float]:
+    # time the depsgraph handler alone, for updates it is supposed to ignore
+    update = addon.material_decal_update
+    handlers = bpy.app.handlers.depsgraph_update_post
+    durations = []
+
+    def timed_handler(scene, depsgraph=None):
+        start = time.perf_counter()
+        update.on_depsgraph_update(scene)
+        durations.append(time.perf_counter() - start)
+
+    handlers.remove(update.on_depsgraph_update)
+    handlers.append(timed_handler)
+    try:
+        for i in range(repeat):
+            # an unrelated receiver material, and a transform-only projector edit
+            material = receivers[i % len(receivers)].data.materials[0]
+            material.node_tree.nodes["Principled BSDF"].inputs["Roughness"].default_value = (i % 10) / 10
+            projectors[i % len(projectors)].location.z += 0.001
+            bpy.context.view_layer.update()
+    finally:
+        handlers.remove(timed_handler)
+        handlers.append(update.on_depsgraph_update)
+
+    if update.has_pending_regeneration():
+        print("warning: ignored updates queued a regeneration")
+    return durations
+
+
+def count_generated() -> tuple[int, int]:
+    nodes = links = 0
+    for node_tree in [x for x in bpy.data.node_groups if x.name.startswith(("__Decal ", ".__DecalMaterial "))]:
+        nodes += len(node_tree.nodes)
+        links += len(node_tree.links)
+    return nodes, links
+
+
+def main():
+    args = parse_args()
+    addon = load_addon()
+    generator = addon.material_decal_node_generator
+    projectors, receivers = create_scene(addon, args)
+    channel_names = [f"Channel {i}" for i in range(args.channels)]
+
+    # full regeneration, including python allocations
+    tracemalloc.start()
+    full = time_call(lambda: generator.generate_nodes(force=True, trigger="benchmark"), args.repeat)
+    python_peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # a single edited projector
+    def edit_one():
+        projectors[0].empty_display_type = "SPHERE" if projectors[0].empty_display_type == "CUBE" else "CUBE"
+        generator.generate_nodes({channel_names[0]}, trigger="benchmark")
+    incremental = time_call(edit_one, args.repeat)
+
+    # nothing changed at all
+    noop = time_call(lambda: generator.generate_nodes(set(channel_names), trigger="benchmark"), args.repeat)
+
+    handler = measure_handler(addon, receivers, projectors, args.repeat * 10)
+    node_count, link_count = count_generated()
+
+    results = {
+        "blender_version": bpy.app.version_string,
+        "parameters": vars(args),
+        "generate_full": full,
+        "generate_full_median": statistics.median(full),
+        "generate_incremental_median": statistics.median(incremental),
+        "generate_noop_median": statistics.median(noop),
+        "handler_ignored_median": statistics.median(handler),
+        "handler_ignored_max": max(handler),
+        "python_peak_memory": python_peak_memory,
+        "process_max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "node_count": node_count,
+        "link_count": link_count,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for metric in COMPARED_METRICS:
+            if metric in baseline and baseline[metric] > 0:
+                ratio = results[metric] / baseline[metric]
+                if ratio > 1 + args.tolerance:
+                    regressions.append({"metric": metric, "baseline": baseline[metric], "result": results[metric], "ratio": ratio})
+        results["regressions"] = regressions
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for metric in COMPARED_METRICS:
+        print(f"{metric}: {results[metric]}")
+    for regression in regressions:
+        print(f"REGRESSION {regression['metric']}: {regression['result']} vs {regression['baseline']} (x{regression['ratio']:.2f})")
+
+    addon.unregister()
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
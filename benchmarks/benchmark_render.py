@@ -0,0 +1,259 @@
+# headless benchmark of what the generated groups cost at render time, run with:
+#   blender --background --factory-startup --python benchmarks/benchmark_render.py -- [options]
+# a fixed scene is rendered with cycles on cpu for every combination of channel type, backend and decal count.
+# each configuration is rendered at n and 2n samples, so the time per sample is told apart from the scene sync
+# and shader compilation done once per render. results are written as json, and with --baseline, configurations
+# worse than the baseline by more than the tolerance are reported and the process exits with code 1
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark_generation import create_decal_material, load_addon  # noqa: E402
+
+CHANNEL_NAME = "Decals"
+
+# metrics compared against the baseline for each configuration, lower is better for all of them
+COMPARED_METRICS = [
+    "time_per_sample",
+    "sync_time",
+    "peak_memory_mb",
+]
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="material decals render cost benchmark")
+    parser.add_argument("--counts", default="0,16,64,256", help="comma separated decal counts")
+    parser.add_argument("--types", default="SHADER,RGBA", help="comma separated channel types")
+    parser.add_argument("--backends", default="NODES", help="comma separated backends, mesh only applies to shader channels")
+    parser.add_argument("--nodes", type=int, default=10, help="nodes per decal material")
+    parser.add_argument("--materials", type=int, default=8, help="distinct decal materials")
+    parser.add_argument("--samples", type=int, default=16)
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=0, help="render threads, 0 to detect")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_render_output.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def setup_render(args):
+    scene = bpy.context.scene
+    scene.render.engine = "CYCLES"
+    scene.cycles.device = "CPU"
+    scene.cycles.use_adaptive_sampling = False
+    scene.cycles.use_denoising = False
+    scene.cycles.seed = 0
+    scene.render.resolution_x = args.resolution
+    scene.render.resolution_y = args.resolution
+    scene.render.resolution_percentage = 100
+    scene.render.threads_mode = "FIXED" if args.threads > 0 else "AUTO"
+    if args.threads > 0:
+        scene.render.threads = args.threads
+    scene.render.filepath = os.path.join(tempfile.gettempdir(), "material_decals_bench_render")
+
+
+def clear_scene(addon):
+    # everything but the predefined groups, so each configuration starts from the same state
+    for object in list(bpy.data.objects):
+        bpy.data.objects.remove(object)
+    for collection in [bpy.data.meshes, bpy.data.materials, bpy.data.cameras, bpy.data.lights]:
+        for data in list(collection):
+            collection.remove(data)
+    for image in [x for x in bpy.data.images if x.type != "RENDER_RESULT"]:
+        bpy.data.images.remove(image)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    for node_tree in [x for x in bpy.data.node_groups if x.name.startswith(("__Decal", ".__DecalMaterial "))]:
+        bpy.data.node_groups.remove(node_tree)
+    addon.material_decal_property.get_decal_channels_props().decal_channels.clear()
+    addon.material_decal_node_generator.reset_generation_state()
+
+
+def create_receiver(channel_type: str):
+    # a 20x20 plane, its material passing through the receiver group of the channel
+    mesh = bpy.data.meshes.new("Receiver")
+    mesh.from_pydata([(-10, -10, 0), (10, -10, 0), (10, 10, 0), (-10, 10, 0)], [], [(0, 1, 2, 3)])
+    receiver = bpy.data.objects.new("Receiver", mesh)
+    bpy.context.scene.collection.objects.link(receiver)
+
+    material = bpy.data.materials.new("Receiver")
+    material.use_nodes = True
+    mesh.materials.append(material)
+    node_tree = material.node_tree
+    bsdf = node_tree.nodes["Principled BSDF"]
+    output = node_tree.nodes["Material Output"]
+    group = node_tree.nodes.new("ShaderNodeGroup")
+    group.node_tree = bpy.data.node_groups["__Decal " + CHANNEL_NAME]
+    if channel_type == "SHADER":
+        node_tree.links.new(bsdf.outputs[0], group.inputs[0])
+        node_tree.links.new(group.outputs[0], output.inputs["Surface"])
+    else:
+        color = node_tree.nodes.new("ShaderNodeRGB")
+        color.outputs[0].default_value = (0.5, 0.5, 0.5, 1)
+        node_tree.links.new(color.outputs[0], group.inputs[0])
+        node_tree.links.new(group.outputs[0], bsdf.inputs["Base Color"])
+
+
+def create_scene(addon, args, channel_type: str, backend: str, count: int):
+    generator = addon.material_decal_node_generator
+    props = addon.material_decal_property
+    generator.ensure_predefined_node_groups_exists()
+
+    channel = props.get_decal_channels_props().decal_channels.add()
+    channel.name = CHANNEL_NAME
+    channel.type = channel_type
+    channel.backend = backend
+
+    materials = [create_decal_material(f"Decal {i}", args.nodes, channel_type) for i in range(args.materials)]
+    rng = random.Random(0)
+    for i in range(count):
+        projector = bpy.data.objects.new(f"Projector {i}", None)
+        projector.empty_display_type = "CUBE"
+        projector.location = (rng.uniform(-9, 9), rng.uniform(-9, 9), 0)
+        projector.rotation_euler = (0, 0, rng.uniform(0, 6.283))
+        projector.scale = (1.5, 1.5, 1)
+        bpy.context.scene.collection.objects.link(projector)
+        target = props.get_decal_projector_props(projector).targets.add()
+        target.name = CHANNEL_NAME
+        target.material = materials[i % len(materials)]
+
+    camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+    camera.data.type = "ORTHO"
+    camera.data.ortho_scale = 20
+    camera.location = (0, 0, 10)
+    bpy.context.scene.collection.objects.link(camera)
+    bpy.context.scene.camera = camera
+
+    sun = bpy.data.objects.new("Sun", bpy.data.lights.new("Sun", "SUN"))
+    sun.data.energy = 3
+    sun.rotation_euler = (0.5, 0.3, 0)
+    bpy.context.scene.collection.objects.link(sun)
+
+    # the receiver group has to exist before the receiver can use it
+    generator.generate_nodes(force=True, trigger="benchmark")
+    create_receiver(channel_type)
+    generator.generate_nodes(force=True, trigger="benchmark")
+    addon.material_decal_update.cancel_pending_regeneration()
+
+
+class RenderStats:
+    # peak memory reported by cycles, only printed in background mode
+    def __init__(self):
+        self.peak_memory_mb = 0.0
+
+    def on_render_stats(self, stats: str):
+        match = re.search(r"Peak ([\d.]+)M", stats)
+        if match:
+            self.peak_memory_mb = max(self.peak_memory_mb, float(match.group(1)))
+
+
+def render(samples: int) -> float:
+    bpy.context.scene.cycles.samples = samples
+    start = time.perf_counter()
+    bpy.ops.render.render()
+    return time.perf_counter() - start
+
+
+def count_generated() -> tuple[int, int]:
+    nodes = faces = 0
+    for node_tree in [x for x in bpy.data.node_groups if x.name.startswith(("__Decal ", ".__DecalMaterial "))]:
+        nodes += len(node_tree.nodes)
+    for object in [x for x in bpy.data.objects if x.get("decal_projector") is not None]:
+        faces += len(object.data.polygons)
+    return nodes, faces
+
+
+def measure_config(addon, args, channel_type: str, backend: str, count: int) -> dict:
+    clear_scene(addon)
+    create_scene(addon, args, channel_type, backend, count)
+    node_count, face_count = count_generated()
+
+    stats = RenderStats()
+    bpy.app.handlers.render_stats.append(stats.on_render_stats)
+    try:
+        single = []
+        double = []
+        for _ in range(args.repeat):
+            single.append(render(args.samples))
+            double.append(render(args.samples * 2))
+    finally:
+        bpy.app.handlers.render_stats.remove(stats.on_render_stats)
+
+    time_per_sample = max(statistics.median(double) - statistics.median(single), 0) / args.samples
+    return {
+        "type": channel_type,
+        "backend": backend,
+        "decals": count,
+        "render": single,
+        "render_double": double,
+        "time_per_sample": time_per_sample,
+        "sync_time": max(statistics.median(single) - time_per_sample * args.samples, 0),
+        "peak_memory_mb": stats.peak_memory_mb,
+        "node_count": node_count,
+        "face_count": face_count,
+    }
+
+
+def main():
+    args = parse_args()
+    addon = load_addon()
+    setup_render(args)
+
+    configs = {}
+    for channel_type in args.types.split(","):
+        for backend in args.backends.split(","):
+            if backend == "MESH" and channel_type != "SHADER":
+                continue  # color channels always use nodes
+            for count in [int(x) for x in args.counts.split(",")]:
+                key = f"{channel_type}_{backend}_{count}"
+                configs[key] = measure_config(addon, args, channel_type, backend, count)
+                print(f"{key}: {configs[key]['time_per_sample'] * 1000:.2f}ms per sample, "
+                      f"{configs[key]['sync_time']:.2f}s sync, {configs[key]['peak_memory_mb']:.1f}M peak")
+
+    results = {
+        "blender_version": bpy.app.version_string,
+        "parameters": vars(args),
+        "configs": configs,
+        "process_max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for key, config in configs.items():
+            baseline_config = baseline["configs"].get(key, {})
+            for metric in COMPARED_METRICS:
+                if baseline_config.get(metric, 0) > 0:
+                    ratio = config[metric] / baseline_config[metric]
+                    if ratio > 1 + args.tolerance:
+                        regressions.append({"config": key, "metric": metric, "baseline": baseline_config[metric],
+                                            "result": config[metric], "ratio": ratio})
+        results["regressions"] = regressions
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['config']} {regression['metric']}: "
+              f"{regression['result']} vs {regression['baseline']} (x{regression['ratio']:.2f})")
+
+    addon.unregister()
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import bpy
+import numpy as np
+from bpy.types import Image
+from .material_decal_property import DecalProjectorTargetProperties, get_decal_channels_props
+from .material_decal_fingerprint import digest
+from .material_decal_graph import GraphIR
+
+# coordinates are clamped into the region of the source, which is what extend does. other extensions would need
+# whatever is outside of [0, 1] masked or wrapped, and are left sampling their own image
+atlas_extensions = ("EXTEND",)
+
+
+class AtlasRegion:
+    # where a source image ended up, in atlas uv space
+    __slots__ = ("atlas", "offset", "scale")
+
+    def __init__(self, atlas: str, offset: tuple[float, float], scale: tuple[float, float]):
+        self.atlas = atlas
+        self.offset = offset
+        self.scale = scale
+
+
+class AtlasState:
+    __slots__ = ("size", "step", "rects", "fingerprints")
+
+    def __init__(self):
+        self.size = (0, 0)
+        self.step = 1  # sources are downscaled by this to fit the max size
+        self.rects: dict[str, tuple[int, int, int, int]] = {}  # source image -> (x, y, width, height) without padding
+        self.fingerprints: dict[str, str] = {}
+
+
+atlas_states: dict[str, AtlasState] = {}  # atlas image -> what it was packed from
+channel_images: dict[str, set[str]] = {}  # channel -> source images packed into its atlases
+dirty_images: set[str] = set()  # sources edited in place, e.g. by texture painting
+
+
+def get_atlas_name(channel_name: str, colorspace: str) -> str:
+    return ".__DecalAtlas " + channel_name + " | " + colorspace
+
+
+def get_image_channels(image: str) -> set[str]:
+    return set(k for k, v in channel_images.items() if image in v)
+
+
+def invalidate_atlas_source(image: str):
+    dirty_images.add(image)
+
+
+def collect_atlas_sources(projector_props_list: list[DecalProjectorTargetProperties]) -> dict[str, list[Image]]:
+    # images sampled by the decal materials, by colorspace as they can't share an atlas otherwise
+    images: dict[str, Image] = {}
+    for material in set(x.material for x in projector_props_list if x.material.use_nodes):
+        for node in [x for x in material.node_tree.nodes if
+                     x.type == "TEX_IMAGE" and x.image is not None and x.extension in atlas_extensions and x.inputs[0].is_linked]:
+            if node.image.source in ["FILE", "GENERATED"] and node.image.size[0] > 0:
+                images[node.image.name] = node.image
+
+    sources: dict[str, list[Image]] = {}
+    for image in sorted(images.values(), key=lambda x: x.name):
+        sources.setdefault(image.colorspace_settings.name, []).append(image)
+    return sources
+
+
+def fingerprint_source(image: Image) -> str:
+    return digest((tuple(image.size), image.filepath_raw, image.source, image.alpha_mode,
+                   image.packed_file.size if image.packed_file else 0))
+
+
+def pack_rects(sizes: list[tuple[int, int]], padding: int) -> tuple[int, int, list[tuple[int, int]]]:
+    # shelf packing, tallest first, into a power of two sized atlas
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    area = sum((w + padding * 2) * (h + padding * 2) for w, h in sizes)
+    width = 1 << max(int(np.ceil(np.log2(max(np.sqrt(area), max(w + padding * 2 for w, _ in sizes))))), 0)
+
+    positions = [(0, 0)] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        (w, h) = (sizes[i][0] + padding * 2, sizes[i][1] + padding * 2)
+        if x + w > width:
+            (x, y, shelf_height) = (0, y + shelf_height, 0)
+        positions[i] = (x + padding, y + padding)
+        x += w
+        shelf_height = max(shelf_height, h)
+    height = 1 << max(int(np.ceil(np.log2(y + shelf_height))), 0)
+    return (width, height, positions)
+
+
+def read_pixels(image: Image, step: int) -> np.ndarray:
+    (width, height) = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, 4)[::step, ::step]
+
+
+def update_atlas(atlas_name: str, images: list[Image], colorspace: str) -> dict[str, AtlasRegion]:
+    props = get_decal_channels_props()
+    padding = props.atlas_padding
+
+    # halve the sources until everything fits
+    step = 1
+    while True:
+        sizes = [((x.size[0] + step - 1) // step, (x.size[1] + step - 1) // step) for x in images]
+        (width, height, positions) = pack_rects(sizes, padding)
+        if max(width, height) <= props.atlas_max_size or min(min(x) for x in sizes) <= 1:
+            break
+        step *= 2
+
+    rects = {x.name: (*positions[i], *sizes[i]) for i, x in enumerate(images)}
+    fingerprints = {x.name: fingerprint_source(x) for x in images}
+
+    atlas = bpy.data.images.get(atlas_name)
+    state = atlas_states.get(atlas_name)
+    incremental = (atlas is not None and
+                   state is not None and
+                   state.rects == rects and
+                   state.size == (width, height) and
+                   tuple(atlas.size) == (width, height))
+    changed = [x for x in images if
+               not incremental or
+               x.name in dirty_images or
+               state.fingerprints.get(x.name) != fingerprints[x.name]]
+
+    if len(changed) > 0:
+        if atlas is None or tuple(atlas.size) != (width, height):
+            if atlas is not None:
+                bpy.data.images.remove(atlas)
+            atlas = bpy.data.images.new(atlas_name, width, height, alpha=True,
+                                        float_buffer=any(x.is_float for x in images))
+            atlas.colorspace_settings.name = colorspace
+
+        pixels = np.zeros((height, width, 4), dtype=np.float32)
+        if incremental:
+            atlas.pixels.foreach_get(pixels.reshape(-1))
+        for image in changed:
+            (x, y, w, h) = rects[image.name]
+            # repeat the edges into the padding, so filtering doesn't bleed in neighbours
+            source = np.pad(read_pixels(image, step), ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+            pixels[y - padding:y + h + padding, x - padding:x + w + padding] = source
+        atlas.pixels.foreach_set(pixels.reshape(-1))
+        atlas.update()
+
+    state = atlas_states[atlas_name] = AtlasState()
+    state.size = (width, height)
+    state.step = step
+    state.rects = rects
+    state.fingerprints = fingerprints
+    dirty_images.difference_update(fingerprints.keys())
+
+    return {k: AtlasRegion(atlas_name, (x / width, y / height), (w / width, h / height)) for k, (x, y, w, h) in rects.items()}
+
+
+def update_channel_atlas(channel_name: str, projector_props_list: list[DecalProjectorTargetProperties]) -> tuple[dict[str, AtlasRegion], str]:
+    # returns the regions of every packed image, and a fingerprint of the layout
+    regions: dict[str, AtlasRegion] = {}
+    for colorspace, images in collect_atlas_sources(projector_props_list).items():
+        regions.update(update_atlas(get_atlas_name(channel_name, colorspace), images, colorspace))
+    channel_images[channel_name] = set(regions.keys())
+
+    fingerprint = digest(sorted((k, v.atlas, v.offset, v.scale) for k, v in regions.items()))
+    return (regions, fingerprint)
+
+
+def apply_atlas(graph: GraphIR, keys: list[str], regions: dict[str, AtlasRegion]):
+    # sample the atlas instead, through a clamped mapping into the region of the original image
+    for key in list(keys):
+        record = graph.nodes[key]
+        image = record.ids.get("image")
+        if record.bl_idname != "ShaderNodeTexImage" or image is None or image[1] not in regions:
+            continue
+        material = bpy.data.materials.get(record.source[0]) if record.source is not None else None
+        source = material.node_tree.nodes.get(record.source[1]) if material and material.node_tree else None
+        if source is None or source.extension not in atlas_extensions:
+            continue  # stays on the original image, as a sampler of its own
+        link = graph.get_input_link(key, 0)
+        if link is None:
+            continue  # implicit uv of the receiver, can't be remapped
+        region = regions[image[1]]
+
+        # vector sockets of map range: 6 vector, 7 from min, 8 from max, 9 to min, 10 to max, output 1
+        mapping_key = key + "|atlas"
+        mapping_node = graph.add_node(mapping_key, "ShaderNodeMapRange", (record.location[0] - 200, record.location[1]))
+        mapping_node.attrs = [("data_type", "FLOAT_VECTOR"), ("interpolation_type", "LINEAR"), ("clamp", True)]
+        mapping_node.values[(False, 7)] = (0.0, 0.0, 0.0)
+        mapping_node.values[(False, 8)] = (1.0, 1.0, 1.0)
+        mapping_node.values[(False, 9)] = (region.offset[0], region.offset[1], 0.0)
+        mapping_node.values[(False, 10)] = (region.offset[0] + region.scale[0], region.offset[1] + region.scale[1], 1.0)
+        graph.links.remove(link)
+        graph.link(link[0], link[1], mapping_key, 6, link[4])
+        graph.link(mapping_key, 1, key, 0)
+        record.ids["image"] = ("images", region.atlas)
+        keys.append(mapping_key)
+
+
+def remove_channel_atlases(channel_name: str):
+    channel_images.pop(channel_name, None)
+    prefix = ".__DecalAtlas " + channel_name + " | "
+    for name in [x for x in atlas_states.keys() if x.startswith(prefix)]:
+        del atlas_states[name]
+
+
+def clear_atlases():
+    atlas_states.clear()
+    channel_images.clear()
+    dirty_images.clear()
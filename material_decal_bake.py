@@ -0,0 +1,252 @@
+import bpy
+from bpy.types import Operator, Context, Image, Material, NodeGroup, Object
+from typing import cast
+from .material_decal_property import DecalChannelProperties, get_decal_channels_props
+from .material_decal_fingerprint import digest, fingerprint_material
+from .material_decal_spatial import find_overlaps, get_projector_extents
+from .material_decal_mesh import fingerprint_receiver_mesh
+from .material_decal_node_generator import add_generated_group_mark, collect_projector_targets, get_culled_group_name
+from .material_decal_update import full_quality_graphs, has_pending_regeneration, run_pending_regeneration
+from .material_decal_localization import T
+
+
+def get_baked_group_name(channel_name: str, material: Material) -> str:
+    return "__DecalBaked " + channel_name + " | " + material.name
+
+
+def get_bake_image_name(channel_name: str, object: Object) -> str:
+    return ".__DecalBake " + channel_name + " | " + object.name
+
+
+def get_bake_group_nodes(channel_name: str) -> dict[Material, list[NodeGroup]]:
+    # materials using the live or baked receiver groups of the channel
+    prefixes = ("__Decal " + channel_name + " | ", "__DecalBaked " + channel_name + " | ")
+    receiver_name = "__Decal " + channel_name
+    result = {}
+    for material in [x for x in bpy.data.materials if x.use_nodes and x.node_tree]:
+        nodes = [x for x in cast(list[NodeGroup], material.node_tree.nodes) if
+                 x.type == "GROUP" and
+                 x.node_tree and
+                 (x.node_tree.name == receiver_name or x.node_tree.name.startswith(prefixes))]
+        if len(nodes) > 0:
+            result[material] = nodes
+    return result
+
+
+def restore_live_groups(channel: DecalChannelProperties, receiver_group_nodes: dict[Material, list[NodeGroup]]):
+    for material, group_nodes in receiver_group_nodes.items():
+        node_tree = bpy.data.node_groups.get(get_culled_group_name(channel.name, material)) if channel.use_receiver_culling else None
+        if node_tree is None:
+            node_tree = bpy.data.node_groups.get("__Decal " + channel.name)
+        for group_node in group_nodes:
+            if group_node.node_tree != node_tree:
+                group_node.node_tree = node_tree
+
+
+def swap_baked_groups(channel: DecalChannelProperties, receiver_group_nodes: dict[Material, list[NodeGroup]], material_users: dict[Material, list[Object]]) -> int:
+    # images are baked per object, so only materials with a single receiver can use them
+    swapped = 0
+    for material, group_nodes in receiver_group_nodes.items():
+        objects = material_users.get(material, [])
+        image = bpy.data.images.get(get_bake_image_name(channel.name, objects[0])) if len(objects) == 1 else None
+        if image is None:
+            continue
+
+        group_name = get_baked_group_name(channel.name, material)
+        node_tree = bpy.data.node_groups.get(group_name)
+        if node_tree is None:
+            node_tree = bpy.data.node_groups.new(group_name, "ShaderNodeTree")
+        node_tree.inputs.clear()
+        node_tree.outputs.clear()
+        node_tree.inputs.new("NodeSocketColor", "Input")
+        node_tree.outputs.new("NodeSocketColor", "Input")
+        node_tree.nodes.clear()
+        add_generated_group_mark(node_tree.nodes)
+
+        uv_node = node_tree.nodes.new("ShaderNodeUVMap")
+        uv_node.location[0] = 0
+        uv_node.location[1] = -50
+        uv_node.uv_map = objects[0].data.uv_layers.active.name
+
+        image_node = node_tree.nodes.new("ShaderNodeTexImage")
+        image_node.location[0] = 200
+        image_node.location[1] = -50
+        image_node.image = image
+        node_tree.links.new(uv_node.outputs[0], image_node.inputs[0])
+
+        group_output = node_tree.nodes.new("NodeGroupOutput")
+        group_output.location[0] = 500
+        group_output.location[1] = -50
+        node_tree.links.new(image_node.outputs[0], group_output.inputs[0])
+
+        for group_node in group_nodes:
+            group_node.node_tree = node_tree
+        swapped += 1
+    return swapped
+
+
+def bake_objects(context: Context, objects: list[Object], receiver_group_nodes: dict[Material, list[NodeGroup]], images: dict[Object, Image]):
+    # route the channel output of every receiver material to an emission shader, and bake it in one go
+    restore = []
+    for object in objects:
+        for material in set(x.material for x in object.material_slots if x.material in receiver_group_nodes):
+            node_tree = material.node_tree
+            output = node_tree.get_output_node("CYCLES")
+            if output is None:
+                continue
+            surface = output.inputs["Surface"]
+            previous = surface.links[0].from_socket if surface.is_linked else None
+
+            emission_node = node_tree.nodes.new("ShaderNodeEmission")
+            node_tree.links.new(receiver_group_nodes[material][0].outputs[0], emission_node.inputs[0])
+            node_tree.links.new(emission_node.outputs[0], surface)
+
+            image_node = node_tree.nodes.new("ShaderNodeTexImage")
+            image_node.image = images[object]
+            node_tree.nodes.active = image_node
+            restore.append((node_tree, surface, previous, emission_node, image_node))
+
+    try:
+        with context.temp_override(selected_objects=objects, selected_editable_objects=objects,
+                                   active_object=objects[0], object=objects[0]):
+            bpy.ops.object.bake(type="EMIT", use_clear=True)
+    finally:
+        for node_tree, surface, previous, emission_node, image_node in restore:
+            node_tree.nodes.remove(emission_node)
+            node_tree.nodes.remove(image_node)
+            if previous is not None:
+                node_tree.links.new(previous, surface)
+
+
+def bake_channel(context: Context, channel: DecalChannelProperties, resolution: int, samples: int, swap_groups: bool) -> tuple[int, int, int]:
+    # returns how many receivers were baked, skipped as unchanged, and how many materials got swapped
+    receiver_group_nodes = get_bake_group_nodes(channel.name)
+    restore_live_groups(channel, receiver_group_nodes)
+
+    material_users: dict[Material, list[Object]] = {}
+    receivers: list[Object] = []
+    for object in [x for x in bpy.data.objects if x.users_collection and x.type == "MESH" and len(x.data.uv_layers) > 0]:
+        materials = set(x.material for x in object.material_slots if x.material in receiver_group_nodes)
+        for material in materials:
+            material_users.setdefault(material, []).append(object)
+        if len(materials) > 0:
+            receivers.append(object)
+
+    # find receivers whose overlapping projectors changed since the last bake
+    projector_props_list = collect_projector_targets()[0].get(channel.name, [])
+    overlaps = find_overlaps([x.id_data for x in projector_props_list],
+                             [get_projector_extents(x.id_data, x.fade_out) for x in projector_props_list],
+                             receivers)
+    depsgraph = context.evaluated_depsgraph_get()
+    images: dict[Object, Image] = {}
+    outdated: list[Object] = []
+    for i, object in enumerate(receivers):
+        fingerprint = digest((
+            resolution,
+            samples,
+            [tuple(x) for x in object.matrix_world],
+            fingerprint_receiver_mesh(object, depsgraph),
+            sorted((x.material.name, fingerprint_material(x.material)) for x in object.material_slots if x.material),
+            [(
+                x.id_data.name,
+                [tuple(v) for v in x.id_data.matrix_world],
+                x.id_data.empty_display_type,
+                x.fade_out,
+                fingerprint_material(x.material),
+            ) for j, x in enumerate(projector_props_list) if overlaps[j, i]],
+        ))
+        image_name = get_bake_image_name(channel.name, object)
+        image = bpy.data.images.get(image_name)
+        if image is not None and image.get("decal_bake_fingerprint") == fingerprint:
+            continue  # unchanged
+        if image is None or tuple(image.size) != (resolution, resolution):
+            if image is not None:
+                bpy.data.images.remove(image)
+            image = bpy.data.images.new(image_name, resolution, resolution, alpha=True)
+        image["decal_bake_fingerprint"] = fingerprint
+        images[object] = image
+        outdated.append(object)
+
+    # objects sharing a material can't be baked together, as the material only has one active image
+    batches: list[tuple[list[Object], set[Material]]] = []
+    for object in outdated:
+        materials = set(x.material for x in object.material_slots if x.material in receiver_group_nodes)
+        batch = next((x for x in batches if x[1].isdisjoint(materials)), None)
+        if batch is None:
+            batch = ([], set())
+            batches.append(batch)
+        batch[0].append(object)
+        batch[1].update(materials)
+
+    scene = context.scene
+    settings = (scene.render.engine, scene.cycles.device, scene.cycles.samples)
+    scene.render.engine = "CYCLES"
+    scene.cycles.device = "CPU"
+    scene.cycles.samples = samples
+    try:
+        for objects, _ in batches:
+            bake_objects(context, objects, receiver_group_nodes, images)
+    except Exception:
+        for image in images.values():
+            del image["decal_bake_fingerprint"]
+        raise
+    finally:
+        (scene.render.engine, scene.cycles.device, scene.cycles.samples) = settings
+
+    for image in images.values():
+        image.pack()
+
+    swapped = swap_baked_groups(channel, receiver_group_nodes, material_users) if swap_groups else 0
+    return (len(outdated), len(receivers) - len(outdated), swapped)
+
+
+class DECAL_OT_bake_channel(Operator):
+    bl_idname = "material_decals.bake_channel"
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_label = T("bake_channel")
+
+    resolution: bpy.props.IntProperty(default=1024, min=16, max=16384, name=T("bake_resolution"))
+    samples: bpy.props.IntProperty(default=16, min=1, name=T("bake_samples"))
+    swap_groups: bpy.props.BoolProperty(default=True, name=T("bake_swap_groups"), description=T("bake_swap_groups_desc"))
+
+    @classmethod
+    def poll(self, context):
+        channel = get_decal_channels_props().get_active_decal_channel()
+        return channel is not None and channel.type == "RGBA"
+
+    def execute(self, context):
+        if has_pending_regeneration():
+            run_pending_regeneration()
+
+        channel = get_decal_channels_props().get_active_decal_channel()
+        try:
+            with full_quality_graphs("bake"):
+                (baked, skipped, swapped) = bake_channel(context, channel, self.resolution, self.samples, self.swap_groups)
+        except RuntimeError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, T("bake_report").format(baked=baked, skipped=skipped, swapped=swapped))
+
+        return {'FINISHED'}
+
+
+class DECAL_OT_restore_live_groups(Operator):
+    bl_idname = "material_decals.restore_live_groups"
+    bl_options = {'UNDO'}
+    bl_label = T("restore_live_groups")
+
+    @classmethod
+    def poll(self, context):
+        return get_decal_channels_props().get_active_decal_channel() is not None
+
+    def execute(self, context):
+        channel = get_decal_channels_props().get_active_decal_channel()
+        restore_live_groups(channel, get_bake_group_nodes(channel.name))
+
+        return {'FINISHED'}
+
+
+classes = (
+    DECAL_OT_bake_channel,
+    DECAL_OT_restore_live_groups,
+)
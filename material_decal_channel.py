@@ -1,5 +1,12 @@
 from bpy.types import Operator, UIList, UILayout, Panel
+from typing import Optional
 from .material_decal_property import get_decal_channels_props
+from .material_decal_stats import get_hit_rate, get_last_run, session_caches
+from .material_decal_update import is_render_farm_mode
+from .material_decal_pipeline import get_generation_progress, is_generation_running
+from .material_decal_node_generator import stale_channels
+from .material_decal_complexity import ComplexityEstimate, get_channel_estimate, get_exceeded_budgets
+from .material_decal_mesh import uses_mesh_backend
 from .material_decal_localization import T
 
 
@@ -34,9 +41,24 @@ class DECAL_OT_remove_channel(Operator):
         return {'FINISHED'}
 
 
+def draw_complexity(layout: UILayout, estimate: Optional[ComplexityEstimate]):
+    if estimate is None:
+        layout.label(text=T("complexity_not_estimated"))
+        return
+
+    exceeded = get_exceeded_budgets(estimate)
+    layout.label(text=T("complexity_estimate").format(nodes=estimate.nodes, samplers=estimate.samplers,
+                                                      bsdfs=estimate.bsdfs, depth=estimate.depth))
+    if len(exceeded) > 0:
+        layout.label(text=T("warn_over_budget", ", ".join(exceeded)), icon="ERROR")
+
+
 class DECAL_UL_channel(UIList):
     def draw_item(self, context, layout: UILayout, data, item, icon, active_data, active_propname):
         icon = "NODE_MATERIAL" if item.type == "SHADER" else "NODE_TEXTURE"
+        estimate = get_channel_estimate(item.name)
+        if estimate is not None and len(get_exceeded_budgets(estimate)) > 0:
+            icon = "ERROR"
         layout.prop(item, "name", text="", icon=icon, emboss=False)
 
 
@@ -69,11 +91,129 @@ class DECAL_PT_channel(Panel):
             layout.label(text=T("channel_info", ":"))
             layout.prop(active, "type")
             layout.label(icon="ERROR", text=T("warn_channel_type"))
+            layout.prop(active, "backend")
+            if active.backend == "MESH" and active.type == "RGBA":
+                layout.label(icon="ERROR", text=T("warn_mesh_backend_rgba"))
+            if uses_mesh_backend(active):
+                layout.prop(active, "mesh_offset")
+                layout.label(icon="INFO", text=T("warn_mesh_backend_bounds"))
+            else:
+                layout.prop(active, "use_receiver_culling")
+                layout.prop(active, "use_atlas")
+                if active.use_atlas:
+                    col = layout.column(align=True)
+                    col.prop(props, "atlas_max_size")
+                    col.prop(props, "atlas_padding")
+
+            layout.label(text=T("complexity", ":"))
+            draw_complexity(layout, get_channel_estimate(active.name))
+
+            row = layout.row(align=True)
+            row.operator("material_decals.bake_channel", icon="RENDER_STILL")
+            row.operator("material_decals.restore_live_groups", icon="LOOP_BACK", text="")
+
+        layout.label(text=T("generator_settings", ":"))
+        layout.prop(props, "share_material_groups")
+        layout.prop(props, "regeneration_delay")
+        layout.prop(props, "defer_during_playback")
+        layout.prop(props, "use_async_generation")
+        layout.prop(props, "use_preview")
+        if props.use_preview:
+            col = layout.column(align=True)
+            col.prop(props, "preview_projector_count")
+            col.prop(props, "preview_image_size")
+        row = layout.row(align=True)
+        row.operator("material_decals.regenerate", icon="FILE_REFRESH")
+        row.operator("material_decals.collect_garbage", icon="TRASH")
+        if is_generation_running():
+            (done, total) = get_generation_progress()
+            row = layout.row()
+            row.label(text=T("generation_progress").format(done=done, total=total) if total > 0 else T("generation_preparing"),
+                      icon="SORTTIME")
+            row.operator("material_decals.cancel_generation", icon="CANCEL", text="")
+        stale = [x.name for x in props.decal_channels if x.name in stale_channels]
+        if len(stale) > 0:
+            layout.label(text=T("stale_channels").format(channels=", ".join(stale)), icon="ERROR")
+        if is_render_farm_mode():
+            row = layout.row()
+            row.label(text=T("render_farm_active"), icon="PAUSE")
+            row.operator("material_decals.exit_render_farm_mode", icon="PLAY", text="")
+        else:
+            layout.operator("material_decals.render_farm_mode", icon="RENDER_ANIMATION")
+
+
+class DECAL_PT_channel_budgets(Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = T("decals")
+    bl_label = T("budgets")
+    bl_parent_id = "DECAL_PT_channel"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        props = get_decal_channels_props()
+
+        col = layout.column(align=True)
+        col.prop(props, "budget_nodes")
+        col.prop(props, "budget_samplers")
+        col.prop(props, "budget_bsdfs")
+        col.prop(props, "budget_depth")
+
+
+class DECAL_PT_channel_stats(Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = T("decals")
+    bl_label = T("generation_stats")
+    bl_parent_id = "DECAL_PT_channel"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        props = get_decal_channels_props()
+
+        layout.prop(props, "log_level")
+        layout.prop(props, "stats_log_path")
+
+        last = get_last_run()
+        if last is None:
+            layout.label(text=T("no_generation_yet"))
+            return
+
+        layout.label(text=T("last_generation", f": {last.duration * 1000:.1f}ms"))
+        layout.label(text=T("trigger", f": {last.trigger}"))
+
+        col = layout.column(align=True)
+        for phase, duration in last.phases.items():
+            row = col.row()
+            row.label(text=phase)
+            row.label(text=f"{duration * 1000:.1f}ms")
+
+        if len(last.channels) > 0:
+            layout.label(text=T("decal_channels", ":"))
+            col = layout.column(align=True)
+            for channel, (result, nodes, links) in last.channels.items():
+                row = col.row()
+                row.label(text=channel)
+                row.label(text=result.lower())
+                row.label(text=T("node_link_count").format(nodes=nodes, links=links))
+
+        layout.label(text=T("cache_hit_rates", ":"))
+        col = layout.column(align=True)
+        for cache, counters in session_caches.items():
+            row = col.row()
+            row.label(text=cache)
+            row.label(text=f"{get_hit_rate(counters) * 100:.0f}% ({counters[0]}/{counters[0] + counters[1]})")
 
 
 classes = (
     DECAL_OT_add_channel,
     DECAL_OT_remove_channel,
     DECAL_PT_channel,
+    DECAL_PT_channel_budgets,
+    DECAL_PT_channel_stats,
     DECAL_UL_channel,
 )
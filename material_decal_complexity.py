@@ -0,0 +1,131 @@
+import bpy
+from bpy.types import Material, Node, NodeTree
+from typing import Iterable, Optional
+from .material_decal_property import get_decal_channels_props
+from .material_decal_fingerprint import fingerprint_material_structure
+from .material_decal_stats import count_cache
+
+# nodes which don't cost anything at render time
+free_node_types = {"FRAME", "REROUTE", "GROUP_INPUT", "GROUP_OUTPUT", "OUTPUT_MATERIAL"}
+# shader nodes only combining closures, not evaluating one
+closure_mix_types = {"MIX_SHADER", "ADD_SHADER"}
+sampler_node_types = {"TEX_IMAGE", "TEX_ENVIRONMENT"}
+
+
+class ComplexityEstimate:
+    __slots__ = ("nodes", "images", "bsdfs", "depth")
+
+    def __init__(self):
+        self.nodes = 0
+        self.images: set[str] = set()  # the same image is only bound once
+        self.bsdfs = 0
+        self.depth = 0
+
+    @property
+    def samplers(self) -> int:
+        return len(self.images)
+
+    def merge_max(self, other: "ComplexityEstimate"):
+        self.nodes = max(self.nodes, other.nodes)
+        self.images |= other.images
+        self.bsdfs = max(self.bsdfs, other.bsdfs)
+        self.depth = max(self.depth, other.depth)
+
+
+def estimate_node_tree(node_tree: NodeTree, group_estimates: Optional[dict[str, ComplexityEstimate]] = None) -> ComplexityEstimate:
+    # nested groups are counted as if they were expanded, which is what the shader compiler sees
+    if group_estimates is None:
+        group_estimates = {}
+    estimate = ComplexityEstimate()
+
+    node_depths: dict[int, int] = {}
+    for node in node_tree.nodes:
+        if node.type in free_node_types:
+            node_depths[node.as_pointer()] = 0
+        elif node.type == "GROUP":
+            if node.node_tree is None or node.node_tree.name in [".__DecalInput", ".__DecalOutput"]:
+                node_depths[node.as_pointer()] = 0
+                continue
+            group = group_estimates.get(node.node_tree.name)
+            if group is None:
+                group_estimates[node.node_tree.name] = ComplexityEstimate()  # guard against recursive groups
+                group = group_estimates[node.node_tree.name] = estimate_node_tree(node.node_tree, group_estimates)
+            estimate.nodes += group.nodes
+            estimate.images |= group.images
+            estimate.bsdfs += group.bsdfs
+            node_depths[node.as_pointer()] = group.depth
+        else:
+            estimate.nodes += 1
+            if node.type in sampler_node_types and node.image is not None:
+                estimate.images.add(node.image.name)
+            if node.type not in closure_mix_types and any(x.type == "SHADER" for x in node.outputs):
+                estimate.bsdfs += 1
+            node_depths[node.as_pointer()] = 1
+
+    # longest chain of dependent nodes
+    inputs: dict[int, list[Node]] = {}
+    for link in node_tree.links:
+        if not link.is_muted:
+            inputs.setdefault(link.to_node.as_pointer(), []).append(link.from_node)
+
+    chain_depths: dict[int, int] = {}
+
+    def get_chain_depth(node: Node) -> int:
+        key = node.as_pointer()
+        depth = chain_depths.get(key)
+        if depth is None:
+            chain_depths[key] = 0  # guard against cycles
+            depth = chain_depths[key] = node_depths.get(key, 0) + max([get_chain_depth(x) for x in inputs.get(key, [])], default=0)
+        return depth
+
+    estimate.depth = max([get_chain_depth(x) for x in node_tree.nodes], default=0)
+    return estimate
+
+
+# material name -> (structure fingerprint, estimate)
+material_estimates: dict[str, tuple[str, ComplexityEstimate]] = {}
+# channel -> estimate of the heaviest group generated for it
+channel_estimates: dict[str, ComplexityEstimate] = {}
+
+
+def estimate_material(material: Material) -> Optional[ComplexityEstimate]:
+    if material is None or not material.use_nodes:
+        return None
+    fingerprint = fingerprint_material_structure(material)
+    cached = material_estimates.get(material.name)
+    count_cache("material_estimate", cached is not None and cached[0] == fingerprint)
+    if cached is None or cached[0] != fingerprint:
+        cached = material_estimates[material.name] = (fingerprint, estimate_node_tree(material.node_tree))
+    return cached[1]
+
+
+def update_channel_estimate(channel_name: str, node_tree_names: Iterable[str]) -> ComplexityEstimate:
+    # culled channels have a group per receiver material, each compiled on its own
+    estimate = ComplexityEstimate()
+    group_estimates = {}
+    for node_tree in [bpy.data.node_groups.get(x) for x in node_tree_names]:
+        if node_tree is not None:
+            estimate.merge_max(estimate_node_tree(node_tree, group_estimates))
+    channel_estimates[channel_name] = estimate
+    return estimate
+
+
+def get_channel_estimate(channel_name: str) -> Optional[ComplexityEstimate]:
+    return channel_estimates.get(channel_name)
+
+
+def get_exceeded_budgets(estimate: ComplexityEstimate) -> list[str]:
+    # names of the budgets exceeded by the estimate, zero budgets are disabled
+    props = get_decal_channels_props()
+    budgets = [
+        ("nodes", estimate.nodes, props.budget_nodes),
+        ("samplers", estimate.samplers, props.budget_samplers),
+        ("bsdfs", estimate.bsdfs, props.budget_bsdfs),
+        ("depth", estimate.depth, props.budget_depth),
+    ]
+    return [name for name, value, budget in budgets if budget > 0 and value > budget]
+
+
+def clear_estimates():
+    material_estimates.clear()
+    channel_estimates.clear()
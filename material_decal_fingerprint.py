@@ -0,0 +1,112 @@
+import hashlib
+from bpy.types import ID, Material, NodeTree, bpy_struct
+from typing import Any, Optional
+from .material_decal_stats import count_cache
+
+# properties that only affect how nodes look in the editor
+ignored_properties = {
+    "rna_type", "name", "label", "location", "width", "width_hidden", "height", "dimensions",
+    "select", "hide", "show_options", "show_preview", "show_texture", "use_custom_color", "color",
+    "parent", "inputs", "outputs", "internal_links",
+}
+
+# material name -> fingerprints of its node tree, dropped whenever the material is updated
+material_fingerprints: dict[str, tuple[str, str]] = {}
+
+
+def digest(data: Any) -> str:
+    # repr of plain python values is stable between sessions, unlike hash()
+    return hashlib.sha1(repr(data).encode()).hexdigest()
+
+
+def to_plain_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, ID):
+        return value.name
+    if isinstance(value, set):
+        return tuple(sorted(value))
+    try:
+        return tuple(to_plain_value(x) for x in value)
+    except TypeError:
+        return repr(value)
+
+
+def collect_struct_values(struct: bpy_struct, data: list, depth: int = 0):
+    for prop in struct.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier.startswith("bl_") or identifier in ignored_properties:
+            continue
+        value = getattr(struct, identifier)
+        if prop.type == "POINTER":
+            if value is None or isinstance(value, ID):
+                data.append((identifier, to_plain_value(value)))
+                if isinstance(value, NodeTree):
+                    data.append((identifier, fingerprint_node_tree(value)))
+            elif depth < 3:
+                collect_struct_values(value, data, depth + 1)
+        elif prop.type == "COLLECTION":
+            if depth < 3:
+                for item in value:
+                    collect_struct_values(item, data, depth + 1)
+        elif not prop.is_readonly:
+            data.append((identifier, to_plain_value(value)))
+
+
+def fingerprint_node_tree(node_tree: NodeTree, values: Optional[list] = None) -> str:
+    # socket default values are collected into values instead if given, so value-only edits can be told apart
+    data = []
+    value_data = data if values is None else values
+    for node in node_tree.nodes:
+        data.append((node.bl_idname, node.name))
+        collect_struct_values(node, data)
+        for socket in [*node.inputs, *node.outputs]:
+            if hasattr(socket, "default_value"):
+                value_data.append((node.name, socket.identifier, to_plain_value(socket.default_value)))
+    for link in node_tree.links:
+        data.append((link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier, link.is_muted))
+    return digest(data)
+
+
+def get_material_fingerprints(material: Material) -> tuple[str, str]:
+    # (structure, socket values) of the material node tree
+    if material is None:
+        return ("", "")
+    fingerprints = material_fingerprints.get(material.name)
+    count_cache("material_fingerprint", fingerprints is not None)
+    if fingerprints is None:
+        values = []
+        structure = fingerprint_node_tree(material.node_tree, values) if material.use_nodes else ""
+        fingerprints = material_fingerprints[material.name] = (structure, digest(values))
+    return fingerprints
+
+
+def fingerprint_material(material: Material) -> str:
+    return "".join(get_material_fingerprints(material))
+
+
+def fingerprint_material_structure(material: Material) -> str:
+    return get_material_fingerprints(material)[0]
+
+
+def invalidate_material_fingerprint(material: Material):
+    material_fingerprints.pop(material.name, None)
+    node_fingerprints.pop(material.name, None)
+
+
+# material name -> (structure fingerprint, node name -> fingerprint of the node without its socket values)
+node_fingerprints: dict[str, tuple[str, dict[str, str]]] = {}
+
+
+def get_node_fingerprints(material: Material) -> dict[str, str]:
+    structure = fingerprint_material_structure(material)
+    cached = node_fingerprints.get(material.name)
+    count_cache("node_fingerprint", cached is not None and cached[0] == structure)
+    if cached is None or cached[0] != structure:
+        fingerprints = {}
+        for node in material.node_tree.nodes:
+            data = [node.bl_idname]
+            collect_struct_values(node, data)
+            fingerprints[node.name] = digest(data)
+        cached = node_fingerprints[material.name] = (structure, fingerprints)
+    return cached[1]
@@ -0,0 +1,123 @@
+import bpy
+from bpy.types import Image, Operator
+from .material_decal_property import get_decal_channels_props
+from .material_decal_graph import applied_graphs
+from .material_decal_atlas import atlas_states
+from .material_decal_stats import log
+from .material_decal_localization import T
+
+# generated data, collected once nothing uses it anymore
+generated_group_prefixes = ("__Decal ", "__DecalBaked ", ".__DecalMaterial ")
+generated_image_prefixes = (".__DecalAtlas ", ".__DecalProxy ")
+
+
+class GarbageReport:
+    __slots__ = ("groups", "nodes", "images", "image_memory", "packed_size", "materials", "meshes", "collections")
+
+    def __init__(self):
+        self.groups = 0
+        self.nodes = 0
+        self.images = 0
+        self.image_memory = 0  # bytes of pixel buffers freed, if they were loaded
+        self.packed_size = 0  # bytes of packed files, which would have been saved in the blend file
+        self.materials = 0
+        self.meshes = 0
+        self.collections = 0
+
+    def total(self) -> int:
+        return self.groups + self.images + self.materials + self.meshes + self.collections
+
+
+def get_image_memory(image: Image) -> int:
+    if not image.has_data:
+        return 0
+    return image.size[0] * image.size[1] * image.channels * (4 if image.is_float else 1)
+
+
+def is_stale_bake_image(image: Image, channel_names: list[str]) -> bool:
+    # bakes of existing channels are kept even if unused, so baking again can skip unchanged receivers
+    return (image.name.startswith(".__DecalBake ") and
+            not any(image.name.startswith(".__DecalBake " + x + " | ") for x in channel_names))
+
+
+def remove_image(image: Image, report: GarbageReport):
+    report.images += 1
+    report.image_memory += get_image_memory(image)
+    report.packed_size += image.packed_file.size if image.packed_file else 0
+    atlas_states.pop(image.name, None)
+    bpy.data.images.remove(image)
+
+
+def collect_garbage() -> GarbageReport:
+    # remove generated groups, images, materials and meshes nothing uses anymore,
+    # along with images only the removed groups were using
+    report = GarbageReport()
+    channel_names = [x.name for x in get_decal_channels_props().decal_channels]
+
+    # groups may only be used by other unused groups, repeat until nothing is left
+    referenced_images: set[str] = set()
+    while True:
+        unused = [x for x in bpy.data.node_groups if x.name.startswith(generated_group_prefixes) and x.users == 0]
+        if len(unused) == 0:
+            break
+        for node_tree in unused:
+            for node in [x for x in node_tree.nodes if x.type == "TEX_IMAGE" and x.image is not None]:
+                referenced_images.add(node.image.name)
+            report.groups += 1
+            report.nodes += len(node_tree.nodes)
+            applied_graphs.pop(node_tree.name, None)
+            bpy.data.node_groups.remove(node_tree)
+
+    for image in [x for x in bpy.data.images if x.users == 0 and (
+        x.name.startswith(generated_image_prefixes) or
+        x.name in referenced_images or
+        is_stale_bake_image(x, channel_names)
+    )]:
+        remove_image(image, report)
+
+    for material in [x for x in bpy.data.materials if x.name.startswith(".__DecalMesh ") and x.users == 0]:
+        report.materials += 1
+        bpy.data.materials.remove(material)
+    for mesh in [x for x in bpy.data.meshes if x.name.startswith("__DecalMesh ") and x.users == 0]:
+        report.meshes += 1
+        bpy.data.meshes.remove(mesh)
+    for collection in [x for x in bpy.data.collections if x.name.startswith("__DecalMeshes ") and
+                       len(x.all_objects) == 0 and len(x.children) == 0]:
+        report.collections += 1
+        bpy.data.collections.remove(collection)
+
+    if report.total() > 0:
+        log("INFO", format_garbage_report(report))
+    return report
+
+
+def format_size(size: int) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def format_garbage_report(report: GarbageReport) -> str:
+    return T("gc_report").format(groups=report.groups, nodes=report.nodes, images=report.images,
+                                 others=report.materials + report.meshes + report.collections,
+                                 memory=format_size(report.image_memory), packed=format_size(report.packed_size))
+
+
+class DECAL_OT_collect_garbage(Operator):
+    bl_idname = "material_decals.collect_garbage"
+    bl_options = {'UNDO'}
+    bl_label = T("collect_garbage")
+    bl_description = T("collect_garbage_desc")
+
+    def execute(self, context):
+        report = collect_garbage()
+        self.report({'INFO'}, format_garbage_report(report) if report.total() > 0 else T("gc_nothing"))
+
+        return {'FINISHED'}
+
+
+classes = (
+    DECAL_OT_collect_garbage,
+)
@@ -0,0 +1,193 @@
+import bpy
+from bpy.types import ID, Node, NodeTree
+from typing import Any, Optional
+from .material_decal_node_clone import copy_attrs
+from .material_decal_fingerprint import to_plain_value
+from .material_decal_stats import measure
+
+
+class NodeRecord:
+    # a node of the desired graph. cloned nodes are copied from their source node,
+    # and only recreated if the fingerprint of the source changes
+    __slots__ = ("bl_idname", "location", "attrs", "ids", "values", "source", "fingerprint")
+
+    def __init__(self, bl_idname: str, location: tuple[float, float] = (0, 0)):
+        self.bl_idname = bl_idname
+        self.location = location
+        self.attrs: list[tuple[str, Any]] = []  # assigned in order, as some of them change the available sockets
+        self.ids: dict[str, tuple[str, str]] = {}  # property -> (bpy.data collection, name)
+        self.values: dict[tuple[bool, int], Any] = {}  # (is output, socket index) -> default value
+        self.source: Optional[tuple[str, str]] = None  # (material, node)
+        self.fingerprint = ""
+
+    def is_same_node(self, other: "NodeRecord") -> bool:
+        # whether a node created for the other record can be reused for this one
+        return (self.bl_idname == other.bl_idname and
+                self.source == other.source and
+                self.fingerprint == other.fingerprint and
+                self.attrs == other.attrs and
+                self.ids == other.ids)
+
+
+# (from node, output index, to node, input index, is muted)
+LinkRecord = tuple[str, int, str, int, bool]
+
+
+class GraphIR:
+    __slots__ = ("nodes", "links")
+
+    def __init__(self):
+        self.nodes: dict[str, NodeRecord] = {}
+        self.links: set[LinkRecord] = set()
+
+    def add_node(self, key: str, bl_idname: str, location: tuple[float, float] = (0, 0)) -> NodeRecord:
+        record = self.nodes[key] = NodeRecord(bl_idname, location)
+        return record
+
+    def link(self, from_key: str, from_index: int, to_key: str, to_index: int, is_muted: bool = False):
+        self.links.add((from_key, from_index, to_key, to_index, is_muted))
+
+    def get_input_link(self, key: str, index: int) -> Optional[LinkRecord]:
+        return next((x for x in self.links if x[2] == key and x[3] == index), None)
+
+
+class ApplyStats:
+    __slots__ = ("created", "removed", "kept", "links_added", "links_removed")
+
+    def __init__(self):
+        self.created = 0
+        self.removed = 0
+        self.kept = 0
+        self.links_added = 0
+        self.links_removed = 0
+
+
+# generated tree -> the graph it was last built from
+applied_graphs: dict[str, GraphIR] = {}
+
+
+def resolve_id(reference: tuple[str, str]) -> Optional[ID]:
+    return getattr(bpy.data, reference[0]).get(reference[1])
+
+
+def create_node(node_tree: NodeTree, record: NodeRecord) -> Node:
+    node = node_tree.nodes.new(record.bl_idname)
+    if record.source is not None:
+        material = bpy.data.materials.get(record.source[0])
+        source = material.node_tree.nodes.get(record.source[1]) if material and material.node_tree else None
+        if source is not None:
+            copy_attrs(source, node)
+            for source_socket, target_socket in [*zip(source.inputs, node.inputs), *zip(source.outputs, node.outputs)]:
+                copy_attrs(source_socket, target_socket)
+    for identifier, reference in record.ids.items():
+        setattr(node, identifier, resolve_id(reference))
+    for identifier, value in record.attrs:
+        setattr(node, identifier, value)
+    return node
+
+
+def set_values(node: Node, record: NodeRecord, last: Optional[NodeRecord]):
+    for (is_output, index), value in record.values.items():
+        if last is not None and last.values.get((is_output, index)) == value:
+            continue
+        sockets = node.outputs if is_output else node.inputs
+        if index < len(sockets):
+            sockets[index].default_value = value
+
+
+def get_socket_index(sockets, socket) -> int:
+    pointer = socket.as_pointer()
+    return next(i for i, x in enumerate(sockets) if x.as_pointer() == pointer)
+
+
+def apply_graph(node_tree: NodeTree, graph: GraphIR) -> tuple[dict[str, Node], ApplyStats]:
+    # make the tree match the graph, touching only what changed since the graph applied last time
+    stats = ApplyStats()
+    last_graph = applied_graphs.get(node_tree.name)
+
+    existing: dict[str, Node] = {}
+    if last_graph is not None:
+        for node in node_tree.nodes:
+            key = node.get("decal_key")
+            if key is not None:
+                existing[key] = node
+        if existing.keys() != last_graph.nodes.keys() or len(existing) != len(node_tree.nodes):
+            last_graph = None  # edited by someone else, start over
+    if last_graph is None:
+        stats.removed = len(node_tree.nodes)
+        node_tree.nodes.clear()
+        existing = {}
+        last_graph = GraphIR()
+
+    # drop nodes which are gone or can't be reused, along with their links
+    nodes: dict[str, Node] = {}
+    for key, node in existing.items():
+        record = graph.nodes.get(key)
+        if record is None or not record.is_same_node(last_graph.nodes[key]):
+            node_tree.nodes.remove(node)
+            stats.removed += 1
+        else:
+            nodes[key] = node
+            stats.kept += 1
+
+    # drop links between kept nodes which aren't wanted anymore
+    stale_links = set(x for x in last_graph.links - graph.links if x[0] in nodes and x[2] in nodes)
+    if len(stale_links) > 0:
+        with measure("link"):
+            keys = {v.as_pointer(): k for k, v in nodes.items()}
+            for link in list(node_tree.links):
+                from_key = keys.get(link.from_node.as_pointer())
+                to_key = keys.get(link.to_node.as_pointer())
+                if from_key is None or to_key is None:
+                    continue
+                record = (from_key, get_socket_index(link.from_node.outputs, link.from_socket),
+                          to_key, get_socket_index(link.to_node.inputs, link.to_socket), link.is_muted)
+                if record in stale_links:
+                    node_tree.links.remove(link)
+                    stats.links_removed += 1
+
+    # create and update nodes
+    kept = set(nodes.keys())
+    for key, record in graph.nodes.items():
+        node = nodes.get(key)
+        last = last_graph.nodes.get(key) if node is not None else None
+        if node is None:
+            with measure("clone"):
+                node = nodes[key] = create_node(node_tree, record)
+            node["decal_key"] = key
+            stats.created += 1
+        if last is None or last.location != record.location:
+            node.location = record.location
+        set_values(node, record, last)
+
+    # links of recreated nodes were removed with them
+    with measure("link"):
+        kept_links = set(x for x in last_graph.links if x[0] in kept and x[2] in kept)
+        for from_key, from_index, to_key, to_index, is_muted in graph.links - kept_links:
+            from_node = nodes[from_key]
+            to_node = nodes[to_key]
+            if from_index >= len(from_node.outputs) or to_index >= len(to_node.inputs):
+                continue  # socket not available
+            link = node_tree.links.new(from_node.outputs[from_index], to_node.inputs[to_index])
+            link.is_muted = is_muted
+            stats.links_added += 1
+
+    applied_graphs[node_tree.name] = graph
+    return (nodes, stats)
+
+
+def get_plain_default(socket) -> Any:
+    return to_plain_value(socket.default_value) if hasattr(socket, "default_value") else None
+
+
+def update_applied_value(node_tree: NodeTree, node: Node, is_output: bool, index: int):
+    # values patched in place have to be recorded too, or the next apply would skip a value equal to the stale one
+    graph = applied_graphs.get(node_tree.name)
+    record = graph.nodes.get(node.get("decal_key")) if graph is not None else None
+    if record is not None:
+        sockets = node.outputs if is_output else node.inputs
+        record.values[(is_output, index)] = get_plain_default(sockets[index])
+
+
+def clear_applied_graphs():
+    applied_graphs.clear()
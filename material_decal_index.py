@@ -0,0 +1,94 @@
+import bpy
+from bpy.types import Object
+from typing import TYPE_CHECKING, Iterable
+from .material_decal_property import get_decal_projector_props
+
+if TYPE_CHECKING:
+    from .material_decal_node_generator import ChannelState
+
+# reverse dependencies of the generated groups, so unrelated updates are dropped with a lookup
+material_channels: dict[str, set[str]] = {}  # decal material -> channels
+projector_channels: dict[str, set[str]] = {}  # projector object -> channels
+transform_channels: dict[str, set[str]] = {}  # projector or receiver object -> channels depending on its transform
+
+index_ready = False
+
+
+def rebuild_index(channel_states: dict[str, "ChannelState"], culled_channels: Iterable[str]):
+    global index_ready
+    material_channels.clear()
+    projector_channels.clear()
+    transform_channels.clear()
+
+    culled_channels = set(culled_channels)
+    for channel, state in channel_states.items():
+        for material in state.materials:
+            material_channels.setdefault(material, set()).add(channel)
+        for object in state.objects:
+            projector_channels.setdefault(object, set()).add(channel)
+        if channel in culled_channels:
+            for object in [*state.objects, *state.receivers]:
+                transform_channels.setdefault(object, set()).add(channel)
+
+    index_ready = True
+
+
+def clear_index():
+    global index_ready
+    material_channels.clear()
+    projector_channels.clear()
+    transform_channels.clear()
+    index_ready = False
+
+
+def is_index_ready() -> bool:
+    return index_ready
+
+
+def get_material_channels(material: str) -> set[str]:
+    return material_channels.get(material, set())
+
+
+def get_projector_channels(object: str) -> set[str]:
+    return projector_channels.get(object, set())
+
+
+def get_transform_channels(object: str) -> set[str]:
+    return transform_channels.get(object, set())
+
+
+# names of objects having projector targets, so generation doesn't have to scan all objects
+projector_registry: set[str] = set()
+projector_registry_ready = False
+
+
+def is_projector(object: Object) -> bool:
+    return object.type == "EMPTY" and len(get_decal_projector_props(object).targets) > 0
+
+
+def rebuild_projector_registry():
+    global projector_registry_ready
+    projector_registry.clear()
+    projector_registry.update(x.name for x in bpy.data.objects if is_projector(x))
+    projector_registry_ready = True
+
+
+def update_projector_registry(object: Object):
+    if is_projector(object):
+        projector_registry.add(object.name)
+    else:
+        projector_registry.discard(object.name)
+
+
+def get_projectors() -> list[Object]:
+    if not projector_registry_ready:
+        rebuild_projector_registry()
+
+    projectors = []
+    for name in sorted(projector_registry):
+        object = bpy.data.objects.get(name)
+        if object is None or not is_projector(object):
+            projector_registry.discard(name)  # removed or renamed
+        elif object.users_collection:  # filter out deleted objects
+            projectors.append(object)
+    return projectors
@@ -101,6 +101,298 @@ __strlist = {
         "en_US": "Changing the decal type will break existing node links!",
         "zh_CN": "修改贴花类型会破坏已有节点连接！"
     },
+    "generator_settings": {
+        "en_US": "Generator Settings",
+        "zh_CN": "生成选项"
+    },
+    "share_material_groups": {
+        "en_US": "Share Material Groups",
+        "zh_CN": "共享材质节点组"
+    },
+    "share_material_groups_desc": {
+        "en_US": "Compile each decal material into one node group shared by all its projectors instead of copying its nodes per projector",
+        "zh_CN": "将每个贴花材质编译为一个由所有投射共享的节点组，而不是为每个投射复制节点"
+    },
+    "regeneration_delay": {
+        "en_US": "Regeneration Delay",
+        "zh_CN": "重新生成延迟"
+    },
+    "regeneration_delay_desc": {
+        "en_US": "How long the scene has to stay idle before queued changes are regenerated. Zero regenerates immediately",
+        "zh_CN": "场景空闲多久后才重新生成排队的修改，为零时立即重新生成"
+    },
+    "receiver_culling": {
+        "en_US": "Receiver Culling",
+        "zh_CN": "按接收者剔除"
+    },
+    "receiver_culling_desc": {
+        "en_US": "Generate a group for each receiver material only containing the projectors overlapping objects using it",
+        "zh_CN": "为每个接收材质生成单独的节点组，仅包含与使用该材质的物体重叠的投射"
+    },
+    "bake_channel": {
+        "en_US": "Bake Channel",
+        "zh_CN": "烘焙通道"
+    },
+    "bake_resolution": {
+        "en_US": "Resolution",
+        "zh_CN": "分辨率"
+    },
+    "bake_samples": {
+        "en_US": "Samples",
+        "zh_CN": "采样"
+    },
+    "bake_swap_groups": {
+        "en_US": "Use Baked Groups",
+        "zh_CN": "使用烘焙节点组"
+    },
+    "bake_swap_groups_desc": {
+        "en_US": "Replace the live decal groups of receiver materials with groups sampling the baked images",
+        "zh_CN": "将接收材质中的贴花节点组替换为采样烘焙图像的节点组"
+    },
+    "bake_report": {
+        "en_US": "Baked {baked} receivers, {skipped} unchanged, {swapped} materials use baked groups",
+        "zh_CN": "已烘焙 {baked} 个接收者，{skipped} 个未改变，{swapped} 个材质使用烘焙节点组"
+    },
+    "restore_live_groups": {
+        "en_US": "Restore Live Groups",
+        "zh_CN": "恢复实时节点组"
+    },
+    "log_level": {
+        "en_US": "Log Level",
+        "zh_CN": "日志级别"
+    },
+    "stats_log_path": {
+        "en_US": "Stats Log",
+        "zh_CN": "统计日志"
+    },
+    "stats_log_path_desc": {
+        "en_US": "Append the statistics of every generation to this file as JSON lines",
+        "zh_CN": "将每次生成的统计信息以 JSON 行的形式追加到该文件"
+    },
+    "generation_stats": {
+        "en_US": "Generation Statistics",
+        "zh_CN": "生成统计"
+    },
+    "no_generation_yet": {
+        "en_US": "Nothing generated yet",
+        "zh_CN": "尚未生成"
+    },
+    "last_generation": {
+        "en_US": "Last Generation",
+        "zh_CN": "上次生成"
+    },
+    "trigger": {
+        "en_US": "Trigger",
+        "zh_CN": "触发原因"
+    },
+    "node_link_count": {
+        "en_US": "{nodes} nodes, {links} links",
+        "zh_CN": "{nodes} 节点，{links} 连接"
+    },
+    "cache_hit_rates": {
+        "en_US": "Cache Hit Rates",
+        "zh_CN": "缓存命中率"
+    },
+    "regenerate_now": {
+        "en_US": "Regenerate Now",
+        "zh_CN": "立即重新生成"
+    },
+    "complexity": {
+        "en_US": "Complexity",
+        "zh_CN": "复杂度"
+    },
+    "complexity_estimate": {
+        "en_US": "{nodes} nodes, {samplers} samplers, {bsdfs} BSDFs, depth {depth}",
+        "zh_CN": "{nodes} 节点，{samplers} 采样器，{bsdfs} BSDF，深度 {depth}"
+    },
+    "complexity_not_estimated": {
+        "en_US": "Not generated yet",
+        "zh_CN": "尚未生成"
+    },
+    "budgets": {
+        "en_US": "Budgets",
+        "zh_CN": "预算"
+    },
+    "budget_nodes": {
+        "en_US": "Nodes",
+        "zh_CN": "节点"
+    },
+    "budget_samplers": {
+        "en_US": "Image Samplers",
+        "zh_CN": "图像采样器"
+    },
+    "budget_bsdfs": {
+        "en_US": "BSDFs",
+        "zh_CN": "BSDF"
+    },
+    "budget_depth": {
+        "en_US": "Chain Depth",
+        "zh_CN": "链深度"
+    },
+    "budget_desc": {
+        "en_US": "Warn when a generated decal group exceeds this, 0 to disable",
+        "zh_CN": "生成的贴花节点组超出时发出警告，0 为禁用"
+    },
+    "budget_samplers_desc": {
+        "en_US": "Warn when a generated decal group uses more images than this, shaders fail to compile once the GPU texture limit is reached. 0 to disable",
+        "zh_CN": "生成的贴花节点组使用的图像超出时发出警告，超出 GPU 纹理数量限制会导致着色器编译失败。0 为禁用"
+    },
+    "warn_over_budget": {
+        "en_US": "Over budget: ",
+        "zh_CN": "超出预算："
+    },
+    "projector_complexity": {
+        "en_US": "Projector Complexity",
+        "zh_CN": "投影器复杂度"
+    },
+    "use_preview": {
+        "en_US": "Preview Quality",
+        "zh_CN": "预览质量"
+    },
+    "use_preview_desc": {
+        "en_US": "Generate simplified groups for the viewport: only the nearest projectors, downscaled images and no fade out. Full groups are generated for renders and bakes",
+        "zh_CN": "为视图生成简化的节点组：仅包含最近的投影器，使用缩小的图像且没有淡出。渲染和烘焙时生成完整节点组"
+    },
+    "preview_projector_count": {
+        "en_US": "Nearest Projectors",
+        "zh_CN": "最近投影器数量"
+    },
+    "preview_projector_count_desc": {
+        "en_US": "Number of projectors nearest to the viewport kept in each channel, 0 to keep all. Updated on regeneration",
+        "zh_CN": "每个通道保留的离视图最近的投影器数量，0 为全部保留。在重新生成时更新"
+    },
+    "preview_image_size": {
+        "en_US": "Proxy Image Size",
+        "zh_CN": "代理图像尺寸"
+    },
+    "preview_image_size_desc": {
+        "en_US": "Images larger than this are replaced with downscaled copies",
+        "zh_CN": "大于此尺寸的图像将被替换为缩小的副本"
+    },
+    "use_atlas": {
+        "en_US": "Pack Images",
+        "zh_CN": "打包图像"
+    },
+    "use_atlas_desc": {
+        "en_US": "Pack images of the decal materials into atlases, so the generated group samples fewer textures. Only image textures with a linked vector and Extend extension are remapped",
+        "zh_CN": "将贴花材质的图像打包为图集，以减少生成节点组采样的纹理数量。仅重映射连接了矢量输入且扩展方式为扩展的图像纹理"
+    },
+    "atlas_max_size": {
+        "en_US": "Atlas Max Size",
+        "zh_CN": "图集最大尺寸"
+    },
+    "atlas_max_size_desc": {
+        "en_US": "Images are downscaled until the atlas fits",
+        "zh_CN": "图像将被缩小直到图集符合尺寸"
+    },
+    "atlas_padding": {
+        "en_US": "Atlas Padding",
+        "zh_CN": "图集间距"
+    },
+    "render_farm_mode": {
+        "en_US": "Render Farm Mode",
+        "zh_CN": "渲染农场模式"
+    },
+    "render_farm_mode_desc": {
+        "en_US": "Regenerate all decal groups once with full quality, then ignore scene updates until resumed",
+        "zh_CN": "以完整质量重新生成所有贴花节点组一次，然后在恢复前忽略场景更新"
+    },
+    "render_farm_force": {
+        "en_US": "Force",
+        "zh_CN": "强制"
+    },
+    "render_farm_force_desc": {
+        "en_US": "Rebuild every channel instead of only the ones that changed",
+        "zh_CN": "重建所有通道而不仅是发生变化的通道"
+    },
+    "render_farm_report": {
+        "en_US": "Decal groups ready in {duration:.2f}s: {rebuilt} rebuilt, {patched} patched, {unchanged} unchanged. Updates are suspended",
+        "zh_CN": "贴花节点组已在 {duration:.2f}s 内就绪：{rebuilt} 个重建，{patched} 个修补，{unchanged} 个未变。更新已暂停"
+    },
+    "render_farm_active": {
+        "en_US": "Updates suspended by render farm mode",
+        "zh_CN": "更新已被渲染农场模式暂停"
+    },
+    "exit_render_farm_mode": {
+        "en_US": "Resume Updates",
+        "zh_CN": "恢复更新"
+    },
+    "defer_during_playback": {
+        "en_US": "Defer During Playback",
+        "zh_CN": "播放时延迟更新"
+    },
+    "defer_during_playback_desc": {
+        "en_US": "Ignore updates while the animation is playing, and transform-only updates while changing frames, until the frame stops changing",
+        "zh_CN": "播放动画时忽略更新，切换帧时忽略仅变换的更新，直到帧不再变化"
+    },
+    "backend": {
+        "en_US": "Backend",
+        "zh_CN": "后端"
+    },
+    "backend_desc": {
+        "en_US": "Nodes projects every decal in the receiver materials. Mesh generates geometry decals clipped from the receivers instead, keeping the receiver materials unchanged",
+        "zh_CN": "节点：在接收材质中投射所有贴花。网格：改为生成从接收者裁剪出的几何贴花，接收材质保持不变"
+    },
+    "mesh_offset": {
+        "en_US": "Surface Offset",
+        "zh_CN": "表面偏移"
+    },
+    "mesh_offset_desc": {
+        "en_US": "Distance the decal geometry is moved along the receiver normals, to avoid z-fighting",
+        "zh_CN": "贴花几何体沿接收者法线移动的距离，以避免深度冲突"
+    },
+    "warn_mesh_backend_rgba": {
+        "en_US": "Color channels always use nodes",
+        "zh_CN": "颜色通道始终使用节点"
+    },
+    "warn_mesh_backend_bounds": {
+        "en_US": "Only cube and sphere projectors are supported, without fading out",
+        "zh_CN": "仅支持立方体和球形投射器，且不支持淡出"
+    },
+    "collect_garbage": {
+        "en_US": "Remove Unused Data",
+        "zh_CN": "移除未使用数据"
+    },
+    "collect_garbage_desc": {
+        "en_US": "Remove generated groups, images, materials and meshes nothing uses anymore. Also runs after every regeneration",
+        "zh_CN": "移除不再被使用的生成节点组、图像、材质和网格。每次重新生成后也会自动运行"
+    },
+    "gc_report": {
+        "en_US": "Removed {groups} groups ({nodes} nodes), {images} images and {others} other data, freeing {memory} of pixels and {packed} of packed files",
+        "zh_CN": "已移除 {groups} 个节点组（{nodes} 个节点）、{images} 张图像和 {others} 个其他数据，释放了 {memory} 像素内存和 {packed} 打包文件"
+    },
+    "gc_nothing": {
+        "en_US": "Nothing to remove",
+        "zh_CN": "没有可移除的数据"
+    },
+    "use_async_generation": {
+        "en_US": "Generate in Background",
+        "zh_CN": "后台生成"
+    },
+    "use_async_generation_desc": {
+        "en_US": "Fingerprint decal materials and generate the channels in small steps across timer ticks, so the interface stays responsive. Renders, bakes and saves wait for it to finish",
+        "zh_CN": "分批计算贴花材质的指纹，并将通道的生成拆分为小步骤，以保持界面响应。渲染、烘焙和保存会等待其完成"
+    },
+    "generation_preparing": {
+        "en_US": "Preparing...",
+        "zh_CN": "准备中..."
+    },
+    "generation_progress": {
+        "en_US": "Generating {done}/{total}",
+        "zh_CN": "正在生成 {done}/{total}"
+    },
+    "cancel_generation": {
+        "en_US": "Cancel Generation",
+        "zh_CN": "取消生成"
+    },
+    "cancel_generation_desc": {
+        "en_US": "Stop generating. Channels not finished yet are marked as out of date until they are generated again",
+        "zh_CN": "停止生成。尚未完成的通道会被标记为过期，直到再次生成"
+    },
+    "stale_channels": {
+        "en_US": "Out of date: {channels}",
+        "zh_CN": "已过期：{channels}"
+    },
 }
 
 
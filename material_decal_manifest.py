@@ -0,0 +1,88 @@
+import json
+from typing import Any
+from . import bl_info
+from .material_decal_property import get_decal_channels_props
+from .material_decal_node_generator import ChannelState, MaterialPatch, TreePatches, channel_states
+from .material_decal_stats import log
+
+# bumped whenever the saved fields or the way fingerprints are computed change
+manifest_format = 3
+
+
+def get_manifest_version() -> list:
+    return [manifest_format, *bl_info["version"]]
+
+
+def state_to_dict(state: ChannelState) -> dict[str, Any]:
+    return {
+        "type": state.type,
+        "objects": sorted(state.objects),
+        "materials": sorted(state.materials),
+        "fingerprint": state.fingerprint,
+        "value_fingerprint": state.value_fingerprint,
+        "fade_outs": state.fade_outs,
+        "material_values": state.material_values,
+        "patches": {
+            tree: {
+                "fade_out_nodes": patches.fade_out_nodes,
+                "material_nodes": {
+                    material: [{"node_names": x.node_names, "outputs": x.outputs} for x in material_patches]
+                    for material, material_patches in patches.material_nodes.items()
+                },
+            } for tree, patches in state.patches.items()
+        },
+        "receivers": sorted(state.receivers),
+        "receiver_fingerprints": state.receiver_fingerprints,
+        "mesh_fingerprints": state.mesh_fingerprints,
+    }
+
+
+def state_from_dict(data: dict[str, Any]) -> ChannelState:
+    state = ChannelState(data["type"])
+    state.objects = set(data["objects"])
+    state.materials = set(data["materials"])
+    state.fingerprint = data["fingerprint"]
+    state.value_fingerprint = data["value_fingerprint"]
+    state.fade_outs = data["fade_outs"]
+    state.material_values = data["material_values"]
+    for tree, patches_data in data["patches"].items():
+        patches = state.patches[tree] = TreePatches()
+        patches.fade_out_nodes = patches_data["fade_out_nodes"]
+        for material, material_patches in patches_data["material_nodes"].items():
+            for patch_data in material_patches:
+                patch = MaterialPatch()
+                patch.node_names = patch_data["node_names"]
+                patch.outputs = [tuple(x) for x in patch_data["outputs"]]
+                patches.material_nodes.setdefault(material, []).append(patch)
+    state.receivers = set(data["receivers"])
+    state.receiver_fingerprints = data["receiver_fingerprints"]
+    state.mesh_fingerprints = data["mesh_fingerprints"]
+    return state
+
+
+def save_manifest():
+    get_decal_channels_props().manifest = json.dumps({
+        "version": get_manifest_version(),
+        "channels": {k: state_to_dict(v) for k, v in channel_states.items()},
+    })
+
+
+def load_manifest() -> bool:
+    # seed the generation state with what the saved groups were generated from,
+    # returns false if there's nothing usable
+    props = get_decal_channels_props()
+    if not props.manifest:
+        return False
+    try:
+        manifest = json.loads(props.manifest)
+        if manifest["version"] != get_manifest_version():
+            log("INFO", "manifest was saved by another version, regenerating everything")
+            return False
+        states = {k: state_from_dict(v) for k, v in manifest["channels"].items()}
+    except (ValueError, KeyError, TypeError) as e:
+        log("INFO", f"failed to read manifest: {e}")
+        return False
+
+    channel_states.clear()
+    channel_states.update(states)
+    return True
@@ -1,5 +1,6 @@
 from bpy.types import Menu, Material, NodeGroup, NodeLink, Context, NODE_MT_add
-from typing import cast
+from typing import Optional, cast
+from .material_decal_stats import count_cache
 from .material_decal_localization import T
 
 
@@ -49,32 +50,59 @@ class DECAL_MT_material(Menu):
         set.value = "False"
 
 
-def get_material_type(material: Material):
-    if material == None:
-        return None
+# material name -> (material type, decal output node name), dropped whenever the material is updated
+material_types: dict[str, tuple[str, Optional[str]]] = {}
+
+
+def infer_material_type(material: Material) -> tuple[str, Optional[str]]:
     output = [] if not material.use_nodes else [x for x in cast(list[NodeGroup], material.node_tree.nodes) if
                                                 x.type == "GROUP" and
                                                 x.node_tree and
                                                 x.node_tree.name == ".__DecalOutput"]
 
     if len(output) == 0:
-        return "INVALID_NO_OUTPUT"
+        return ("INVALID_NO_OUTPUT", None)
 
     if len(output) > 1:
-        return "INVALID_MULTI_OUTPUT"
+        return ("INVALID_MULTI_OUTPUT", None)
 
     node: NodeGroup = output[0]
     links = node.inputs["Output"].links
     if len(links) == 0:
-        return "INVALID_NO_OUTPUT"
+        return ("INVALID_NO_OUTPUT", node.name)
 
     source_type = cast(list[NodeLink], node.inputs["Output"].links)[0].from_socket.type
     if source_type in ["RGBA", "VALUE", "VECTOR"]:
-        return "RGBA"
+        return ("RGBA", node.name)
     elif source_type == "SHADER":
-        return "SHADER"
+        return ("SHADER", node.name)
     else:
-        return "INVALID_UNKNOWN_OUTPUT"
+        return ("INVALID_UNKNOWN_OUTPUT", node.name)
+
+
+def get_material_type_info(material: Material) -> tuple[str, Optional[str]]:
+    info = material_types.get(material.name)
+    count_cache("material_type", info is not None)
+    if info is None:
+        info = material_types[material.name] = infer_material_type(material)
+    return info
+
+
+def get_material_type(material: Material):
+    if material == None:
+        return None
+    return get_material_type_info(material)[0]
+
+
+def get_decal_output_node(material: Material) -> Optional[NodeGroup]:
+    if material == None:
+        return None
+    node_name = get_material_type_info(material)[1]
+    return material.node_tree.nodes.get(node_name) if node_name else None
+
+
+def invalidate_material_type(material: Material):
+    material_types.pop(material.name, None)
 
 
 def menu_add_decal_coords_node(self: Menu, context: Context):
@@ -0,0 +1,291 @@
+import bpy
+import bmesh
+import hashlib
+import numpy as np
+from bpy.types import Collection, Depsgraph, Material, Mesh, Object
+from typing import TYPE_CHECKING, Generator
+from .material_decal_property import DecalChannelProperties, DecalProjectorTargetProperties
+from .material_decal_fingerprint import digest, fingerprint_material
+from .material_decal_spatial import find_overlaps, get_projector_extents, is_degenerate
+from .material_decal_stats import count_cache, log
+
+if TYPE_CHECKING:
+    from .material_decal_node_generator import ChannelState
+
+
+def uses_mesh_backend(channel: DecalChannelProperties) -> bool:
+    # color decals mix into a socket of the receiver, which geometry can't do
+    return channel.backend == "MESH" and channel.type == "SHADER"
+
+
+class ReceiverGeometry:
+    # evaluated receiver mesh in world space, as triangles
+    __slots__ = ("positions", "normals", "triangles", "fingerprint")
+
+    def __init__(self, positions: np.ndarray, normals: np.ndarray, triangles: np.ndarray, fingerprint: str):
+        self.positions = positions
+        self.normals = normals
+        self.triangles = triangles
+        self.fingerprint = fingerprint
+
+
+# receiver -> fingerprint of its evaluated geometry, kept until the depsgraph reports the receiver changed
+geometry_fingerprints: dict[str, str] = {}
+
+
+def invalidate_receiver_geometry(object: str):
+    geometry_fingerprints.pop(object, None)
+
+
+def clear_receiver_geometry():
+    geometry_fingerprints.clear()
+
+
+def read_receiver_geometry(object: Object, depsgraph: Depsgraph) -> ReceiverGeometry:
+    evaluated = object.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", positions)
+        normals = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("normal", normals)
+        triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", triangles)
+    finally:
+        evaluated.to_mesh_clear()
+
+    matrix = np.array(object.matrix_world, dtype=np.float64)
+    fingerprint = hashlib.sha1(positions.tobytes() + triangles.tobytes() + matrix.tobytes()).hexdigest()
+
+    positions = positions.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = normals.reshape(-1, 3) @ np.linalg.pinv(matrix[:3, :3])  # receivers may be scaled to zero
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, np.newaxis]
+    return ReceiverGeometry(positions, normals, triangles.reshape(-1, 3), fingerprint)
+
+
+def fingerprint_receiver_mesh(object: Object, depsgraph: Depsgraph) -> str:
+    # evaluated geometry and uv maps in object space, what a bake of the receiver depends on besides its materials
+    evaluated = object.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", positions)
+        loops = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loops)
+        triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", triangles)
+        sha = hashlib.sha1(positions.tobytes() + loops.tobytes() + triangles.tobytes())
+        for uv_layer in mesh.uv_layers:
+            uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+            uv_layer.data.foreach_get("uv", uvs)
+            sha.update(repr((uv_layer.name, uv_layer.active, uv_layer.active_render)).encode())
+            sha.update(uvs.tobytes())
+    finally:
+        evaluated.to_mesh_clear()
+    return sha.hexdigest()
+
+
+def build_decal_mesh(mesh: Mesh, projector: Object, extents: np.ndarray, geometries: list[ReceiverGeometry], offset: float):
+    # receiver triangles touching the projected volume, offset along their normals and clipped to it,
+    # in projector space with the projected coordinates as uv
+    inverse = np.linalg.inv(np.array(projector.matrix_world, dtype=np.float64))
+    bm = bmesh.new()
+    uv_layer = bm.loops.layers.uv.new("UVMap")
+
+    for geometry in geometries:
+        local = (geometry.positions + geometry.normals * offset) @ inverse[:3, :3].T + inverse[:3, 3]
+        corners = local[geometry.triangles]
+        inside = np.all((corners.min(axis=1) <= extents) & (corners.max(axis=1) >= -extents), axis=1)
+        if not inside.any():
+            continue
+        (used, remapped) = np.unique(geometry.triangles[inside], return_inverse=True)
+        verts = [bm.verts.new(x) for x in local[used].tolist()]
+        for a, b, c in remapped.reshape(-1, 3).tolist():
+            try:
+                bm.faces.new((verts[a], verts[b], verts[c]))
+            except ValueError:
+                pass  # degenerate or duplicated triangle
+
+    for axis in range(3):
+        for sign in (1, -1):
+            normal = [0.0, 0.0, 0.0]
+            normal[axis] = sign
+            bmesh.ops.bisect_plane(bm, geom=[*bm.verts, *bm.edges, *bm.faces], dist=1e-6,
+                                   plane_co=[x * extents[axis] for x in normal], plane_no=normal, clear_outer=True)
+
+    # same as the mapping of the node backend, decal coordinates are in [0, 1] inside the projector
+    for face in bm.faces:
+        for loop in face.loops:
+            loop[uv_layer].uv = (loop.vert.co.x * 0.5 + 0.5, loop.vert.co.y * 0.5 + 0.5)
+
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+def get_mesh_material_name(material: Material) -> str:
+    return ".__DecalMesh " + material.name
+
+
+def ensure_mesh_material(material: Material) -> Material:
+    # a copy of the decal material with its decal outputs wired to a real material output,
+    # as output nodes inside groups are ignored. decal coordinates come from the uv of the decal mesh
+    from .material_decal_node_generator import find_group_nodes, try_relink
+
+    fingerprint = fingerprint_material(material)
+    mesh_material = bpy.data.materials.get(get_mesh_material_name(material))
+    count_cache("mesh_material", mesh_material is not None and mesh_material.get("decal_fingerprint") == fingerprint)
+    if mesh_material is not None and mesh_material.get("decal_fingerprint") == fingerprint:
+        return mesh_material
+    if mesh_material is not None:
+        bpy.data.materials.remove(mesh_material)
+
+    mesh_material = material.copy()
+    mesh_material.name = get_mesh_material_name(material)
+    mesh_material.use_fake_user = False
+    mesh_material.blend_method = "HASHED"
+    mesh_material.shadow_method = "NONE"
+    mesh_material["decal_fingerprint"] = fingerprint
+
+    node_tree = mesh_material.node_tree
+    for node in [x for x in node_tree.nodes if x.type == "OUTPUT_MATERIAL"]:
+        node_tree.nodes.remove(node)
+    decal_output = find_group_nodes(node_tree.nodes, ".__DecalOutput")[0]
+    (x, y) = decal_output.location
+
+    transparent_node = node_tree.nodes.new("ShaderNodeBsdfTransparent")
+    transparent_node.location = (x, y - 150)
+
+    mix_node = node_tree.nodes.new("ShaderNodeMixShader")
+    mix_node.location = (x + 200, y)
+    try_relink(node_tree, decal_output.inputs["Alpha"], mix_node.inputs[0])
+    node_tree.links.new(transparent_node.outputs[0], mix_node.inputs[1])
+    try_relink(node_tree, decal_output.inputs["Output"], mix_node.inputs[2])
+
+    output_node = node_tree.nodes.new("ShaderNodeOutputMaterial")
+    output_node.location = (x + 400, y)
+    node_tree.links.new(mix_node.outputs[0], output_node.inputs[0])
+    node_tree.nodes.remove(decal_output)
+    return mesh_material
+
+
+def get_mesh_collection_name(channel_name: str) -> str:
+    return "__DecalMeshes " + channel_name
+
+
+def ensure_mesh_collection(channel_name: str) -> Collection:
+    collection = bpy.data.collections.get(get_mesh_collection_name(channel_name))
+    if collection is None:
+        collection = bpy.data.collections.new(get_mesh_collection_name(channel_name))
+    scene_collection = bpy.context.scene.collection
+    if scene_collection.children.get(collection.name) is None:
+        scene_collection.children.link(collection)
+    return collection
+
+
+def create_decal_object(collection: Collection, channel_name: str, projector: str) -> Object:
+    # names may get truncated, objects are found by their decal_projector property instead
+    mesh = bpy.data.meshes.new("__DecalMesh " + channel_name + " | " + projector)
+    object = bpy.data.objects.new(mesh.name, mesh)
+    object["decal_projector"] = projector
+    object.hide_select = True
+    object.visible_shadow = False
+    collection.objects.link(object)
+    return object
+
+
+def set_decal_material(object: Object, material: Material):
+    mesh = object.data
+    if len(mesh.materials) == 0:
+        mesh.materials.append(material)
+    elif mesh.materials[0] != material:
+        mesh.materials[0] = material
+
+
+def remove_decal_object(object: Object):
+    mesh = object.data
+    bpy.data.objects.remove(object)
+    if mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
+
+def generate_mesh_decals(channel_name: str, channel: DecalChannelProperties, projector_props_list: list[DecalProjectorTargetProperties],
+                         receivers: list[Object], state: "ChannelState", last_fingerprints: dict[str, str]) -> Generator[None, None, None]:
+    # one decal object for each projector, only rebuilt if the projector or the receivers it touches changed.
+    # a step for each rebuilt mesh
+    collection = ensure_mesh_collection(channel_name)
+    objects: dict[str, Object] = {}
+    for object in list(collection.objects):
+        projector = object.get("decal_projector")
+        if projector is None or projector in objects or object.type != "MESH":
+            continue  # not ours
+        objects[projector] = object
+
+    extents = [get_projector_extents(x.id_data, 0) for x in projector_props_list]
+    overlaps = find_overlaps([x.id_data for x in projector_props_list], extents, receivers)
+    state.receivers = set(x.name for x in receivers)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    geometries: dict[int, ReceiverGeometry] = {}  # read lazily, most receivers aren't touched by anything
+
+    def get_geometry(index: int) -> ReceiverGeometry:
+        if index not in geometries:
+            geometries[index] = read_receiver_geometry(receivers[index], depsgraph)
+            geometry_fingerprints[receivers[index].name] = geometries[index].fingerprint
+        return geometries[index]
+
+    def get_geometry_fingerprint(index: int) -> str:
+        # reading the geometry is what rebuilding costs, unchanged receivers aren't read just to be fingerprinted
+        fingerprint = geometry_fingerprints.get(receivers[index].name)
+        count_cache("receiver_geometry", fingerprint is not None)
+        return fingerprint if fingerprint is not None else get_geometry(index).fingerprint
+
+    rebuilt = 0
+    for i, props in enumerate(projector_props_list):
+        projector = props.id_data
+        if np.isinf(extents[i]).any():
+            log("INFO", f"{projector.name} isn't bounded, the mesh backend of {channel_name} skips it")
+            continue
+        if is_degenerate(np.array(projector.matrix_world)):
+            log("INFO", f"{projector.name} is scaled to zero, the mesh backend of {channel_name} skips it")
+            continue
+
+        indices = np.nonzero(overlaps[i])[0].tolist()
+        fingerprint = digest((
+            [tuple(x) for x in projector.matrix_world],
+            projector.empty_display_type,
+            props.material.name,
+            channel.mesh_offset,
+            [(receivers[x].name, get_geometry_fingerprint(x)) for x in indices],
+        ))
+        state.mesh_fingerprints[projector.name] = fingerprint
+
+        object = objects.get(projector.name)
+        count_cache("mesh_decal", object is not None and last_fingerprints.get(projector.name) == fingerprint)
+        if object is None:
+            object = objects[projector.name] = create_decal_object(collection, channel_name, projector.name)
+        elif last_fingerprints.get(projector.name) == fingerprint:
+            set_decal_material(object, ensure_mesh_material(props.material))  # recreated if its values changed
+            continue
+
+        build_decal_mesh(object.data, projector, extents[i], [get_geometry(x) for x in indices], channel.mesh_offset)
+        set_decal_material(object, ensure_mesh_material(props.material))
+        object.matrix_world = projector.matrix_world
+        rebuilt += 1
+        yield
+
+    for projector in [x for x in objects.keys() if x not in state.mesh_fingerprints]:
+        remove_decal_object(objects.pop(projector))
+    log("DEBUG", f"{channel_name}: {rebuilt} of {len(projector_props_list)} decal meshes rebuilt")
+
+
+def remove_mesh_decals(channel_name: str):
+    collection = bpy.data.collections.get(get_mesh_collection_name(channel_name))
+    if collection is None:
+        return
+    for object in [x for x in collection.objects if x.get("decal_projector") is not None]:
+        remove_decal_object(object)
+    if len(collection.objects) == 0 and len(collection.children) == 0:
+        bpy.data.collections.remove(collection)
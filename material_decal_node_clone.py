@@ -0,0 +1,94 @@
+from bpy.types import ID, Node, NodeTree, bpy_struct
+from typing import Optional
+
+# properties that are copied some other way, or point back into the node tree
+skipped_properties = {"rna_type", "inputs", "outputs", "internal_links", "links", "node", "parent", "dimensions"}
+
+
+class PropertyPlan:
+    __slots__ = ("values", "structs", "collections")
+
+    def __init__(self, rna):
+        self.values: list[str] = []  # writable properties, assigned directly
+        self.structs: list[str] = []  # readonly pointers to nested structs
+        self.collections: list[tuple[str, int]] = []  # collections and how many arguments their new() takes
+
+        builtins = bpy_struct.__dict__.keys()
+        for prop in rna.properties:
+            identifier = prop.identifier
+            if identifier.startswith("bl_") or identifier in builtins or identifier in skipped_properties:
+                continue
+            if not prop.is_readonly:
+                self.values.append(identifier)
+            elif prop.type == "COLLECTION":
+                new_args = -1
+                if prop.srna and "new" in prop.srna.functions:
+                    new_args = len([x for x in prop.srna.functions["new"].parameters if not x.is_output])
+                self.collections.append((identifier, new_args))
+            elif prop.type == "POINTER":
+                self.structs.append(identifier)
+
+
+# rna identifier -> property plan, computed once per node / socket / struct type
+property_plans: dict[str, PropertyPlan] = {}
+
+
+def get_property_plan(struct: bpy_struct) -> PropertyPlan:
+    rna = struct.bl_rna
+    plan = property_plans.get(rna.identifier)
+    if plan is None:
+        plan = property_plans[rna.identifier] = PropertyPlan(rna)
+    return plan
+
+
+def copy_attrs(source: bpy_struct, target: bpy_struct):
+    plan = get_property_plan(source)
+    for identifier in plan.values:
+        setattr(target, identifier, getattr(source, identifier))
+    for identifier, new_args in plan.collections:
+        source_items = getattr(source, identifier)
+        target_items = getattr(target, identifier)
+        if new_args >= 0:
+            while len(target_items) < len(source_items):
+                target_items.new(*[0] * new_args)
+        for i in range(min(len(source_items), len(target_items))):
+            copy_attrs(source_items[i], target_items[i])
+    for identifier in plan.structs:
+        value = getattr(source, identifier)
+        if value is not None and not isinstance(value, ID):
+            copy_attrs(value, getattr(target, identifier))
+
+
+def copy_node_tree(source: NodeTree, target: NodeTree, node_map: Optional[dict[str, Node]] = None) -> list[Node]:
+    # node_map receives source node name -> copied node, if given
+    new_nodes = []
+    target_nodes: dict[int, Node] = {}
+    socket_indices: dict[int, int] = {}
+
+    # copy nodes
+    for source_node in source.nodes:
+        target_node = target.nodes.new(source_node.bl_idname)
+        copy_attrs(source_node, target_node)
+        for i, (source_socket, target_socket) in enumerate(zip(source_node.inputs, target_node.inputs)):
+            copy_attrs(source_socket, target_socket)
+            socket_indices[source_socket.as_pointer()] = i
+        for i, (source_socket, target_socket) in enumerate(zip(source_node.outputs, target_node.outputs)):
+            copy_attrs(source_socket, target_socket)
+            socket_indices[source_socket.as_pointer()] = i
+        new_nodes.append(target_node)
+        target_nodes[source_node.as_pointer()] = target_node
+        if node_map is not None:
+            node_map[source_node.name] = target_node
+
+    # copy links
+    for source_link in source.links:
+        from_index = socket_indices.get(source_link.from_socket.as_pointer())
+        to_index = socket_indices.get(source_link.to_socket.as_pointer())
+        if from_index is None or to_index is None:
+            continue  # socket not available on the copied node
+        from_node = target_nodes[source_link.from_node.as_pointer()]
+        to_node = target_nodes[source_link.to_node.as_pointer()]
+        link = target.links.new(from_node.outputs[from_index], to_node.inputs[to_index])
+        link.is_muted = source_link.is_muted
+
+    return new_nodes
@@ -2,14 +2,23 @@ import bpy
 from bpy.types import (
     Nodes, NodeTree, Node, NodeGroup, NodeSocket, NodeLink,
     Material, Object,
-    Depsgraph, DepsgraphUpdate,
-    bpy_struct, bpy_prop_collection
 )
-from bpy.app.handlers import persistent
-from mathutils import Vector
-from typing import cast
+from typing import Any, Generator, Iterable, Optional, cast
 from .material_decal_property import DecalProjectorTargetProperties, get_decal_channels_props, get_decal_projector_props
-from .material_decal_material import get_material_type
+from .material_decal_material import get_decal_output_node, get_material_type, material_types
+from .material_decal_node_clone import copy_node_tree
+from .material_decal_spatial import find_overlaps, get_projector_extents
+from .material_decal_index import clear_index, get_projectors, rebuild_index
+from .material_decal_stats import begin_run, count_cache, end_run, log, measure, measure_steps, record_channel
+from .material_decal_fingerprint import (
+    digest, fingerprint_material_structure, get_material_fingerprints, get_node_fingerprints, material_fingerprints
+)
+from .material_decal_graph import GraphIR, NodeRecord, apply_graph, clear_applied_graphs, get_plain_default, update_applied_value
+from .material_decal_atlas import AtlasRegion, apply_atlas, clear_atlases, remove_channel_atlases, update_channel_atlas
+from .material_decal_preview import apply_proxy_images, is_preview_active, remove_proxy_images, select_preview_projectors
+from .material_decal_complexity import channel_estimates, clear_estimates, get_exceeded_budgets, update_channel_estimate
+from .material_decal_mesh import clear_receiver_geometry, generate_mesh_decals, remove_mesh_decals, uses_mesh_backend
+from .material_decal_gc import collect_garbage
 from .material_decal_localization import T
 
 
@@ -66,56 +75,250 @@ def ensure_predefined_node_groups_exists():
         output_node.location[1] = -50
         node_group.links.new(mix_node.outputs[0], output_node.inputs[0])
 
-
-def get_socket_index(socket: NodeSocket) -> int:
-    return int(socket.path_from_id()[:-1].split("[")[-1])
-
-
-def copy_node_tree(source: NodeTree, target: NodeTree) -> list[Node]:
-    def copy_attrs(source: bpy_struct, target: bpy_struct):
-        for attr_name in [x.identifier for x in source.bl_rna.properties if
-                          not x.identifier.startswith("bl_") and
-                          x.identifier not in bpy_struct.__dict__.keys() and
-                          x.identifier not in ["inputs", "outputs"]]:
-            attr = getattr(source, attr_name)
-            attr_target = getattr(target, attr_name)
-            if hasattr(target, "is_property_readonly") and not target.is_property_readonly(attr_name):
-                setattr(target, attr_name, attr)
-            elif isinstance(attr, bpy_prop_collection):
-                if hasattr(attr, "new"):
-                    args = [0 for x in attr.rna_type.functions["new"].parameters if not x.is_output]
-                    while len(attr_target) < len(attr):
-                        attr_target.new(*args)
-                for i in range(len(attr_target)):
-                    if hasattr(attr[i], "bl_rna"):
-                        copy_attrs(attr[i], attr_target[i])
-                    else:
-                        attr[i] = attr_target[i]
-            elif hasattr(attr, "bl_rna") and not hasattr(attr, attr_name):
-                copy_attrs(attr, attr_target)
-
-    # copy nodes
-    new_nodes = []
-    name_map = {}
-    for source_node in source.nodes:
-        target_node = target.nodes.new(source_node.bl_idname)
-        copy_attrs(source_node, target_node)
-        for i in range(len(target_node.inputs)):
-            copy_attrs(source_node.inputs[i], target_node.inputs[i])
-        for i in range(len(target_node.outputs)):
-            copy_attrs(source_node.outputs[i], target_node.outputs[i])
-        new_nodes.append(target_node)
-        name_map[source_node.name] = target_node.name
-
-    # copy links
-    for source_node in source.nodes:
-        target_node = target.nodes[name_map[source_node.name]]
-
-        for i, source_input in enumerate(source_node.inputs):
-            for source_link in source_input.links:
-                target.links.new(target.nodes[name_map[source_link.from_node.name]].outputs[get_socket_index(source_link.from_socket)], target_node.inputs[i])
-
-    return new_nodes
+    if bpy.data.node_groups.get(".__DecalMaskCube") is None:
+        # inside the xy bounds, fading out along z
+        node_group = create_mask_group(".__DecalMaskCube")
+        (group_input, group_output, fade_end) = [node_group.nodes[x] for x in ["Group Input", "Group Output", "Fade End"]]
+
+        abs_node = node_group.nodes.new("ShaderNodeVectorMath")
+        abs_node.location[0] = 200
+        abs_node.location[1] = -50
+        abs_node.operation = "ABSOLUTE"
+        node_group.links.new(group_input.outputs[0], abs_node.inputs[0])
+
+        sep_node = node_group.nodes.new("ShaderNodeSeparateXYZ")
+        sep_node.location[0] = 400
+        sep_node.location[1] = -50
+        node_group.links.new(abs_node.outputs[0], sep_node.inputs[0])
+
+        xy_max_node = node_group.nodes.new("ShaderNodeMath")
+        xy_max_node.location[0] = 600
+        xy_max_node.location[1] = -50
+        xy_max_node.operation = "MAXIMUM"
+        node_group.links.new(sep_node.outputs[0], xy_max_node.inputs[0])
+        node_group.links.new(sep_node.outputs[1], xy_max_node.inputs[1])
+
+        less_cmp_node = node_group.nodes.new("ShaderNodeMath")
+        less_cmp_node.location[0] = 800
+        less_cmp_node.location[1] = -50
+        less_cmp_node.operation = "LESS_THAN"
+        node_group.links.new(xy_max_node.outputs[0], less_cmp_node.inputs[0])
+        less_cmp_node.inputs[1].default_value = 1
+
+        range_node = create_mask_range_node(node_group, sep_node.outputs[2], fade_end.outputs[0])
+
+        min_node = node_group.nodes.new("ShaderNodeMath")
+        min_node.location[0] = 1000
+        min_node.location[1] = -50
+        min_node.operation = "MINIMUM"
+        node_group.links.new(less_cmp_node.outputs[0], min_node.inputs[0])
+        node_group.links.new(range_node.outputs[0], min_node.inputs[1])
+        node_group.links.new(min_node.outputs[0], group_output.inputs[0])
+
+    if bpy.data.node_groups.get(".__DecalMaskSphere") is None:
+        # fading out along the distance to the center
+        node_group = create_mask_group(".__DecalMaskSphere")
+        (group_input, group_output, fade_end) = [node_group.nodes[x] for x in ["Group Input", "Group Output", "Fade End"]]
+
+        length_node = node_group.nodes.new("ShaderNodeVectorMath")
+        length_node.location[0] = 200
+        length_node.location[1] = -50
+        length_node.operation = "LENGTH"
+        node_group.links.new(group_input.outputs[0], length_node.inputs[0])
+
+        range_node = create_mask_range_node(node_group, length_node.outputs["Value"], fade_end.outputs[0])
+        node_group.links.new(range_node.outputs[0], group_output.inputs[0])
+
+
+# projector display type -> mask group, other types aren't masked
+mask_group_names = {
+    "CUBE": ".__DecalMaskCube",
+    "SPHERE": ".__DecalMaskSphere",
+}
+
+
+def create_mask_group(name: str) -> NodeTree:
+    node_group = bpy.data.node_groups.new(name, "ShaderNodeTree")
+    add_generated_group_mark(node_group.nodes)
+    node_group.inputs.new("NodeSocketVector", "Vector")
+    s = node_group.inputs.new("NodeSocketFloat", "Fade")
+    s.min_value = 0
+    node_group.outputs.new("NodeSocketFloat", "Alpha")
+    node_group.use_fake_user = True
+
+    group_input = node_group.nodes.new("NodeGroupInput")
+    group_input.name = "Group Input"
+    group_input.location[0] = 0
+    group_input.location[1] = -50
+
+    group_output = node_group.nodes.new("NodeGroupOutput")
+    group_output.name = "Group Output"
+    group_output.location[0] = 1200
+    group_output.location[1] = -50
+
+    # 1 + fade, kept above 1 so a zero fade becomes a hard edge instead of an empty range
+    fade_max_node = node_group.nodes.new("ShaderNodeMath")
+    fade_max_node.location[0] = 200
+    fade_max_node.location[1] = -250
+    fade_max_node.operation = "MAXIMUM"
+    node_group.links.new(group_input.outputs[1], fade_max_node.inputs[0])
+    fade_max_node.inputs[1].default_value = 1e-5
+
+    fade_end_node = node_group.nodes.new("ShaderNodeMath")
+    fade_end_node.name = "Fade End"
+    fade_end_node.location[0] = 400
+    fade_end_node.location[1] = -250
+    fade_end_node.operation = "ADD"
+    node_group.links.new(fade_max_node.outputs[0], fade_end_node.inputs[0])
+    fade_end_node.inputs[1].default_value = 1
+    return node_group
+
+
+def create_mask_range_node(node_group: NodeTree, value: NodeSocket, fade_end: NodeSocket) -> Node:
+    range_node = node_group.nodes.new("ShaderNodeMapRange")
+    range_node.location[0] = 800
+    range_node.location[1] = -250
+    range_node.data_type = "FLOAT"
+    range_node.interpolation_type = "SMOOTHERSTEP"
+    node_group.links.new(value, range_node.inputs[0])
+    range_node.inputs[1].default_value = 1
+    node_group.links.new(fade_end, range_node.inputs[2])
+    range_node.inputs[3].default_value = 1
+    range_node.inputs[4].default_value = 0
+    return range_node
+
+
+def find_group_nodes(nodes: list[Node], group_name: str) -> list[NodeGroup]:
+    return [x for x in cast(list[NodeGroup], nodes) if
+            x.type == "GROUP" and
+            x.node_tree and
+            x.node_tree.name == group_name]
+
+
+def replace_group_nodes_with_socket(node_tree: NodeTree, nodes: list[Node], group_name: str, socket: NodeSocket):
+    for group_node in find_group_nodes(nodes, group_name):
+        for link in cast(list[NodeLink], group_node.outputs[0].links):
+            node_tree.links.new(socket, link.to_socket)
+        node_tree.nodes.remove(group_node)
+        nodes.remove(group_node)
+
+
+def copy_default_value(source: NodeSocket, target: NodeSocket):
+    if type(source.default_value) is float and type(target.default_value) is not float:
+        target.default_value = [source.default_value] * 4
+    else:
+        target.default_value = source.default_value
+
+
+def try_relink(node_tree: NodeTree, source: NodeSocket, target: NodeSocket):
+    if len(source.links) == 0:
+        copy_default_value(source, target)
+    else:
+        node_tree.links.new(source.links[0].from_socket, target)
+
+
+class MaterialPatch:
+    # where the values of a decal material ended up in a generated tree
+    __slots__ = ("node_names", "outputs")
+
+    def __init__(self):
+        self.node_names: dict[str, str] = {}  # source node -> copied node
+        self.outputs: list[tuple[int, str, bool, int]] = []  # unlinked .__DecalOutput input -> (node, is output socket, socket index)
+
+
+class TreePatches:
+    # generated nodes holding values copied from projectors and decal materials, so value-only edits can be patched in place
+    def __init__(self):
+        self.fade_out_nodes: dict[str, list[str]] = {}  # projector target -> mask group nodes using its fade out
+        self.material_nodes: dict[str, list[MaterialPatch]] = {}
+
+
+def apply_material_patch(node_tree: NodeTree, material: Material, patch: MaterialPatch):
+    source_nodes = material.node_tree.nodes
+    for source_name, target_name in patch.node_names.items():
+        source = source_nodes.get(source_name)
+        target = node_tree.nodes.get(target_name)
+        if source is None or target is None:
+            continue
+        for is_output, source_sockets, target_sockets in [(False, source.inputs, target.inputs), (True, source.outputs, target.outputs)]:
+            for i, (source_socket, target_socket) in enumerate(zip(source_sockets, target_sockets)):
+                if hasattr(source_socket, "default_value"):
+                    target_socket.default_value = source_socket.default_value
+                    update_applied_value(node_tree, target, is_output, i)
+
+    decal_outputs = get_decal_output_node(material)
+    for index, target_name, is_output, socket_index in patch.outputs:
+        target = node_tree.nodes.get(target_name)
+        if target is not None and decal_outputs is not None:
+            copy_default_value(decal_outputs.inputs[index], (target.outputs if is_output else target.inputs)[socket_index])
+            update_applied_value(node_tree, target, is_output, socket_index)
+
+
+# decal materials compiled into node groups since their last update
+compiled_material_groups: set[str] = set()
+compiled_material_patches: dict[str, MaterialPatch] = {}
+
+
+def get_material_group_name(material: Material) -> str:
+    return ".__DecalMaterial " + material.name
+
+
+def ensure_material_group(material: Material, material_type: str) -> NodeTree:
+    # compile the decal material into a hidden group with the decal coordinates as its input,
+    # so projectors sharing the material can share its nodes too
+    group_name = get_material_group_name(material)
+    node_group = bpy.data.node_groups.get(group_name)
+    compiled = node_group is not None and material.name in compiled_material_groups
+    count_cache("material_group", compiled)
+    if compiled:
+        return node_group
+
+    if node_group is None:
+        node_group = bpy.data.node_groups.new(group_name, "ShaderNodeTree")
+    node_group.inputs.clear()
+    node_group.outputs.clear()
+    node_group.inputs.new("NodeSocketVector", "Vector")
+    node_group.outputs.new("NodeSocketColor" if material_type == "RGBA" else "NodeSocketShader", "Output")
+    s = node_group.outputs.new("NodeSocketFloat", "Alpha")
+    s.min_value = 0
+    s.max_value = 1
+
+    node_group.nodes.clear()
+    add_generated_group_mark(node_group.nodes)
+    node_map = {}
+    decal_material_nodes = copy_node_tree(material.node_tree, node_group, node_map)
+    patch = MaterialPatch()
+    (min_x, min_y, max_x, max_y) = calc_nodes_bounds(decal_material_nodes)
+
+    group_input = node_group.nodes.new("NodeGroupInput")
+    group_input.location[0] = min_x - 200
+    group_input.location[1] = max_y
+    replace_group_nodes_with_socket(node_group, decal_material_nodes, ".__DecalInput", group_input.outputs[0])
+
+    group_output = node_group.nodes.new("NodeGroupOutput")
+    group_output.location[0] = max_x + 200
+    group_output.location[1] = max_y
+    decal_outputs = find_group_nodes(decal_material_nodes, ".__DecalOutput")[0]
+    for i in range(2):
+        source = decal_outputs.inputs[i]
+        if len(source.links) == 0:
+            # keep the unlinked default value
+            value_node = node_group.nodes.new("ShaderNodeValue")
+            value_node.location[0] = max_x
+            value_node.location[1] = max_y
+            value_node.outputs[0].default_value = source.default_value
+            node_group.links.new(value_node.outputs[0], group_output.inputs[i])
+            patch.outputs.append((i, value_node.name, True, 0))
+        else:
+            try_relink(node_group, source, group_output.inputs[i])
+    node_group.nodes.remove(decal_outputs)
+    decal_material_nodes.remove(decal_outputs)
+
+    alive = set(id(x) for x in decal_material_nodes)
+    patch.node_names = {k: v.name for k, v in node_map.items() if id(v) in alive}
+    compiled_material_patches[material.name] = patch
+    compiled_material_groups.add(material.name)
+    return node_group
 
 
 def calc_nodes_bounds(nodes: list[Node]) -> tuple[float, float, float, float]:
@@ -129,25 +332,92 @@ def calc_nodes_bounds(nodes: list[Node]) -> tuple[float, float, float, float]:
     return (min_x, min_y, max_x, max_y)
 
 
-def move_nodes(nodes: list[Node], x: float, y: float):
-    for node in nodes:
-        node.location.x += x
-        node.location.y += y
-
-
-def generate_nodes():
-    # get projectors
+class ChannelState:
+    def __init__(self, type: str):
+        self.type = type
+        self.objects: set[str] = set()
+        self.materials: set[str] = set()
+        self.fingerprint = ""
+        self.value_fingerprint = ""
+        self.fade_outs: dict[str, float] = {}  # projector target -> fade out
+        self.material_values: dict[str, str] = {}
+        self.patches: dict[str, TreePatches] = {}  # generated tree -> its patchable values
+        self.receivers: set[str] = set()  # receiver objects of culled channels
+        self.receiver_fingerprints: dict[str, str] = {}
+        self.mesh_fingerprints: dict[str, str] = {}  # projector -> what its decal mesh was built from
+
+
+# what each receiver group was generated from, used to find out which groups an update affects
+channel_states: dict[str, ChannelState] = {}
+# channels a cancelled run didn't get to, out of date until they are generated again
+stale_channels: set[str] = set()
+
+
+def get_channel_fingerprints(channel_type: str, projector_props_list: list[DecalProjectorTargetProperties], preview: bool,
+                             atlas_fingerprint: str) -> tuple[str, str]:
+    # everything the generated graph depends on except the projector transforms,
+    # split into the graph structure and the values that can be patched in place
+    props = get_decal_channels_props()
+    structure = digest((
+        channel_type,
+        props.share_material_groups,
+        props.preview_image_size if preview else 0,
+        atlas_fingerprint,
+        [(
+            get_target_id(x),  # node keys depend on it
+            x.id_data.empty_display_type,
+            x.material.name,
+            fingerprint_material_structure(x.material),
+        ) for x in projector_props_list],
+    ))
+    values = digest([(x.fade_out, get_material_fingerprints(x.material)[1]) for x in projector_props_list])
+    return (structure, values)
+
+
+def apply_value_patches(last_state: ChannelState, state: ChannelState, projector_props_list: list[DecalProjectorTargetProperties]):
+    # write changed values into the generated nodes, only valid if the structure didn't change
+    fade_outs = {k: v for k, v in state.fade_outs.items() if last_state.fade_outs.get(k) != v}
+    materials = {x.material.name: x.material for x in projector_props_list if
+                 last_state.material_values.get(x.material.name) != state.material_values[x.material.name]}
+
+    for tree_name, patches in state.patches.items():
+        node_tree = bpy.data.node_groups.get(tree_name)
+        if node_tree is None:
+            continue
+        for target, fade_out in fade_outs.items():
+            for node in [node_tree.nodes.get(x) for x in patches.fade_out_nodes.get(target, [])]:
+                if node is not None:
+                    node.inputs["Fade"].default_value = fade_out
+                    update_applied_value(node_tree, node, False, 1)
+        for material_name, material in materials.items():
+            for patch in patches.material_nodes.get(material_name, []):
+                apply_material_patch(node_tree, material, patch)
+
+    for material_name, material in materials.items():
+        node_tree = bpy.data.node_groups.get(get_material_group_name(material))
+        patch = compiled_material_patches.get(material_name)
+        if node_tree is not None and patch is not None:
+            apply_material_patch(node_tree, material, patch)
+
+
+def collect_projector_targets() -> tuple[dict[str, list[DecalProjectorTargetProperties]], dict[str, ChannelState]]:
+    # valid projector targets of each channel, and what each channel depends on
     decal_channels = get_decal_channels_props().decal_channels
     actions_list = []
-    for projector_props_list in [get_decal_projector_props(x) for x in bpy.data.objects if
-                                 x.users_collection and  # filter out deleted objects
-                                 x.type == "EMPTY" and
-                                 len(get_decal_projector_props(x).targets) > 0]:
-        for target_props in projector_props_list.targets:
+    sources: dict[str, ChannelState] = {}
+    for projector in get_projectors():
+        projector_props = get_decal_projector_props(projector)
+        for target_props in projector_props.targets:
             i = decal_channels.find(target_props.name)
             if i < 0:
                 continue  # not exist
 
+            # record sources even if invalid, so fixing them later triggers the regeneration
+            state = sources.setdefault(target_props.name, ChannelState(decal_channels[i].type))
+            state.objects.add(projector.name)
+            if target_props.material:
+                state.materials.add(target_props.material.name)
+
             if decal_channels[i].type != get_material_type(target_props.material):
                 continue  # type mismatch
 
@@ -157,266 +427,476 @@ def generate_nodes():
     for i in actions_list:
         actions.setdefault(i[0], []).append(i[1])
 
+    return (actions, sources)
+
+
+def generate_nodes(dirty_channels: Optional[set[str]] = None, force: bool = False, trigger: str = "manual"):
+    begin_run(trigger)
+    try:
+        generate_channels(dirty_channels, force)
+        with measure("gc"):
+            collect_garbage()
+    finally:
+        end_run()
+
+
+class GenerationInput:
+    # what a generation run works from, collected once before any channel is generated
+    __slots__ = ("dirty_channels", "force", "preview", "actions", "sources")
+
+    def __init__(self, dirty_channels: Optional[set[str]], force: bool):
+        self.dirty_channels = dirty_channels
+        self.force = force
+        self.preview = is_preview_active()
+        self.actions: dict[str, list[DecalProjectorTargetProperties]] = {}
+        self.sources: dict[str, ChannelState] = {}
+
+
+def generate_channels(dirty_channels: Optional[set[str]], force: bool):
+    # regenerate receiver groups of dirty channels, or all of them if not specified.
+    # new channels and channels with their type changed are always regenerated,
+    # and channels whose fingerprint didn't change are skipped unless forced
+    input = begin_generation(dirty_channels, force)
+    for channel_name in [x.name for x in get_decal_channels_props().decal_channels]:
+        generate_channel(input, channel_name)
+    finish_generation()
+
+
+def begin_generation(dirty_channels: Optional[set[str]], force: bool) -> GenerationInput:
+    # get projectors
+    decal_channels = get_decal_channels_props().decal_channels
+    input = GenerationInput(dirty_channels, force)
+    with measure("collect"):
+        (input.actions, input.sources) = collect_projector_targets()
+
     for node_tree in [x for x in bpy.data.node_groups if x.name.startswith("__Decal")]:
         # remove fake user on decal receivers to drop unused ones
         node_tree.use_fake_user = False
 
-    # setup receiver groups
+    for channel_name in [x for x in channel_states.keys() if decal_channels.find(x) < 0]:
+        del channel_states[channel_name]
+        stale_channels.discard(channel_name)
+        channel_estimates.pop(channel_name, None)
+        remove_channel_atlases(channel_name)
+        remove_mesh_decals(channel_name)
+
     for channel_name in [x.name for x in decal_channels]:
-        receiver_name = "__Decal " + channel_name
-        channel_type = decal_channels[channel_name].type
+        node_tree = bpy.data.node_groups.get("__Decal " + channel_name)
+        if node_tree is not None:
+            node_tree.use_fake_user = True
+    return input
+
 
-        node_tree = bpy.data.node_groups.get(receiver_name)
+def generate_channel(input: GenerationInput, channel_name: str):
+    for _ in generate_channel_steps(input, channel_name):
+        pass
+
+
+def generate_channel_steps(input: GenerationInput, channel_name: str) -> Generator[None, None, None]:
+    # the generation of a channel as steps small enough to be spread over timer ticks, one for each projector
+    # added to a graph and each tree applied. the channel state is only recorded once all of them are done,
+    # so a run stopped in between regenerates the channel next time
+    # setup the receiver group
+    decal_channels = get_decal_channels_props().decal_channels
+    if decal_channels.find(channel_name) < 0:
+        return  # removed since the run started
+    (force, preview) = (input.force, input.preview)
+    receiver_name = "__Decal " + channel_name
+    channel_type = decal_channels[channel_name].type
+
+    node_tree = bpy.data.node_groups.get(receiver_name)
+    if node_tree is None:
+        node_tree = bpy.data.node_groups.new(receiver_name, "ShaderNodeTree")
+    node_tree.use_fake_user = True
+
+    state = channel_states.get(channel_name)
+    if not (force or
+            input.dirty_channels is None or
+            channel_name in input.dirty_channels or
+            state is None or
+            state.type != channel_type or
+            len(node_tree.nodes) == 0):
+        return  # up to date
+    stale_channels.discard(channel_name)
+
+    projector_props_list = input.actions.get(channel_name, [])
+    use_mesh = uses_mesh_backend(decal_channels[channel_name])
+    mesh_props_list = []
+    if use_mesh:
+        # the receiver group only passes the input through, decals are generated as geometry
+        (mesh_props_list, projector_props_list) = (projector_props_list, [])
+    if preview:
+        projector_props_list = select_preview_projectors(projector_props_list)
+    (atlas_regions, atlas_fingerprint) = ({}, "")
+    if decal_channels[channel_name].use_atlas and not use_mesh and not get_decal_channels_props().share_material_groups:
+        # shared material groups are compiled from the materials as they are, nothing would sample the atlas
+        with measure("atlas"):
+            (atlas_regions, atlas_fingerprint) = update_channel_atlas(channel_name, projector_props_list)
+    else:
+        remove_channel_atlases(channel_name)
+    yield
+    with measure("fingerprint"):
+        (fingerprint, value_fingerprint) = get_channel_fingerprints(channel_type, projector_props_list, preview, atlas_fingerprint)
+        new_state = input.sources.get(channel_name, ChannelState(channel_type))
+        new_state.fingerprint = fingerprint
+        new_state.value_fingerprint = value_fingerprint
+        new_state.fade_outs = {get_target_id(x): x.fade_out for x in projector_props_list}
+        new_state.material_values = {x.material.name: get_material_fingerprints(x.material)[1] for x in projector_props_list}
+    unchanged = not force and state is not None and state.fingerprint == fingerprint and len(node_tree.nodes) > 0
+    count_cache("channel_fingerprint", unchanged)
+    if unchanged:
+        new_state.patches = state.patches
+        if state.value_fingerprint != value_fingerprint:
+            with measure("patch"):
+                apply_value_patches(state, new_state, projector_props_list)
+            record_channel(channel_name, "PATCHED", node_tree)
+        else:
+            record_channel(channel_name, "UNCHANGED", node_tree)
+    else:
+        patches = yield from generate_receiver_nodes(node_tree, channel_type, projector_props_list, preview, atlas_regions)
+        new_state.patches = {node_tree.name: patches}
+        record_channel(channel_name, "REBUILT", node_tree)
+
+    if use_mesh:
+        with measure("mesh"):
+            receivers = sorted(set(x for objects in get_material_users(get_receiver_group_nodes(channel_name)).values() for x in objects),
+                               key=lambda x: x.name)
+        last_fingerprints = state.mesh_fingerprints if state is not None and not force else {}
+        yield from measure_steps("mesh", generate_mesh_decals(channel_name, decal_channels[channel_name], mesh_props_list, receivers,
+                                                              new_state, last_fingerprints))
+    elif force or state is None or len(state.mesh_fingerprints) > 0:
+        remove_mesh_decals(channel_name)
+
+    if decal_channels[channel_name].use_receiver_culling and not use_mesh:
+        yield from measure_steps("culling", generate_culled_receiver_nodes(channel_name, channel_type, projector_props_list, new_state,
+                                                                           state.receiver_fingerprints if unchanged else {}, preview,
+                                                                           atlas_regions))
+    elif force or state is None or (len(state.receivers) > 0 and len(state.mesh_fingerprints) == 0):
+        restore_culled_receivers(channel_name)
+
+    if not unchanged or decal_channels[channel_name].use_receiver_culling or channel_name not in channel_estimates:
+        with measure("complexity"):
+            estimate = update_channel_estimate(channel_name, new_state.patches.keys())
+        exceeded = get_exceeded_budgets(estimate)
+        if len(exceeded) > 0:
+            log("INFO", f"channel {channel_name} is over budget: {', '.join(exceeded)}")
+    channel_states[channel_name] = new_state
+
+
+def finish_generation():
+    decal_channels = get_decal_channels_props().decal_channels
+    rebuild_index(channel_states, [x.name for x in decal_channels if x.use_receiver_culling or uses_mesh_backend(x)])
+    if not get_decal_channels_props().use_preview:
+        remove_proxy_images()
+
+
+def get_culled_group_name(channel_name: str, material: Material) -> str:
+    return "__Decal " + channel_name + " | " + material.name
+
+
+def get_receiver_group_nodes(channel_name: str) -> dict[Material, list[NodeGroup]]:
+    # materials using the receiver group of the channel, or one of its culled variants
+    receiver_name = "__Decal " + channel_name
+    result = {}
+    for material in [x for x in bpy.data.materials if x.use_nodes and x.node_tree]:
+        nodes = [x for x in cast(list[NodeGroup], material.node_tree.nodes) if
+                 x.type == "GROUP" and
+                 x.node_tree and
+                 (x.node_tree.name == receiver_name or x.node_tree.name.startswith(receiver_name + " | "))]
+        if len(nodes) > 0:
+            result[material] = nodes
+    return result
+
+
+def get_material_users(materials: Iterable[Material]) -> dict[Material, list[Object]]:
+    materials = set(materials)
+    material_users: dict[Material, list[Object]] = {}
+    for object in [x for x in bpy.data.objects if x.users_collection and x.type == "MESH"]:
+        for material in set(x.material for x in object.material_slots if x.material in materials):
+            material_users.setdefault(material, []).append(object)
+    return material_users
+
+
+def restore_culled_receivers(channel_name: str):
+    node_tree = bpy.data.node_groups.get("__Decal " + channel_name)
+    for group_nodes in get_receiver_group_nodes(channel_name).values():
+        for group_node in group_nodes:
+            if group_node.node_tree != node_tree:
+                group_node.node_tree = node_tree
+
+
+def generate_culled_receiver_nodes(channel_name: str, channel_type: str, projector_props_list: list[DecalProjectorTargetProperties],
+                                   state: ChannelState, last_fingerprints: dict[str, str], preview: bool,
+                                   atlas_regions: dict[str, AtlasRegion]) -> Generator[None, None, None]:
+    # give every receiver material its own group, only containing projectors overlapping objects using it
+    receiver_group_nodes = get_receiver_group_nodes(channel_name)
+    if len(receiver_group_nodes) == 0:
+        return
+
+    material_users = get_material_users(receiver_group_nodes)
+    receivers = list(set(x for objects in material_users.values() for x in objects))
+    receiver_indices = {x.as_pointer(): i for i, x in enumerate(receivers)}
+    overlaps = find_overlaps([x.id_data for x in projector_props_list],
+                             [get_projector_extents(x.id_data, x.fade_out) for x in projector_props_list],
+                             receivers)
+    state.receivers = set(x.name for x in receivers)
+    yield
+
+    for material, group_nodes in receiver_group_nodes.items():
+        indices = [receiver_indices[x.as_pointer()] for x in material_users.get(material, [])]
+        overlapping = [x for i, x in enumerate(projector_props_list) if overlaps[i, indices].any()]
+
+        group_name = get_culled_group_name(channel_name, material)
+        node_tree = bpy.data.node_groups.get(group_name)
         if node_tree is None:
-            node_tree = bpy.data.node_groups.new(receiver_name, "ShaderNodeTree")
+            node_tree = bpy.data.node_groups.new(group_name, "ShaderNodeTree")
 
-        def setup_sockets(sockets):
-            while len(sockets) > 1:
-                sockets.remove(sockets[-1])
-            if len(sockets) > 0 and sockets[0].type == channel_type:
-                return
-            else:
-                sockets.clear()
-                sockets.new("NodeSocketColor" if channel_type == "RGBA" else "NodeSocketShader", "Input")
+        fingerprint = digest((state.fingerprint, [x.id_data.name for x in overlapping]))
+        state.receiver_fingerprints[material.name] = fingerprint
+        if last_fingerprints.get(material.name) != fingerprint or len(node_tree.nodes) == 0:
+            state.patches[node_tree.name] = yield from generate_receiver_nodes(node_tree, channel_type, overlapping, preview, atlas_regions)
 
-        setup_sockets(node_tree.inputs)
-        setup_sockets(node_tree.outputs)
-        node_tree.use_fake_user = True
+        for group_node in group_nodes:
+            if group_node.node_tree != node_tree:
+                group_node.node_tree = node_tree
 
-        # clear exist nodes
-        node_tree.nodes.clear()
-        add_generated_group_mark(node_tree.nodes)
 
-        # create default nodes
-        default_input = node_tree.nodes.new("NodeGroupInput")
-        default_input.location[0] = 0
-        default_input.location[1] = -50
-        default_output = node_tree.nodes.new("NodeGroupOutput")
-        default_output.location[0] = 200
-        default_output.location[1] = -50
-        node_tree.links.new(default_input.outputs[0], default_output.inputs[0])
-
-    # generate node geoups
-    for channel_name, projector_props_list in actions.items():
-        receiver_name = "__Decal " + channel_name
-        channel_type = decal_channels[channel_name].type
-
-        node_tree = bpy.data.node_groups.get(receiver_name)
-
-        # clear exist nodes
-        node_tree.nodes.clear()
-        add_generated_group_mark(node_tree.nodes)
-
-        # create new nodes
-        ofs = 0
-
-        def create_node(type):
-            nonlocal ofs
-            n = node_tree.nodes.new(type)
-            n.location[0] = ofs
-            n.location[1] = -50
-            ofs += 200
-            return n
-
-        group_input = create_node("NodeGroupInput")
-
-        # loop over projectors
-        prev_output = group_input.outputs[0]
-        for props in [x for x in projector_props_list]:
-            decal_material_nodes = copy_node_tree(props.material.node_tree, node_tree)
-
-            # replace all .__DecalInput groups
-            def replace_decal_inputs():
-                decal_inputs_list = [x for x in cast(list[NodeGroup], decal_material_nodes) if
-                                     x.type == "GROUP" and
-                                     x.node_tree and
-                                     x.node_tree.name == ".__DecalInput"]
-
-                tex_coords_node = create_node("ShaderNodeTexCoord")
-                tex_coords_node.object = props.id_data
-
-                mapping_node = create_node("ShaderNodeMapping")
-                mapping_node.vector_type = "POINT"
-                mapping_node.inputs[1].default_value = Vector((0.5, 0.5, 0.5))
-                mapping_node.inputs[2].default_value = Vector((0, 0, 0))
-                mapping_node.inputs[3].default_value = Vector((0.5, 0.5, 0.5))
-                node_tree.links.new(tex_coords_node.outputs["Object"], mapping_node.inputs[0])
-
-                for decal_inputs in decal_inputs_list:
-                    for coord_links in cast(list[NodeLink], decal_inputs.outputs[0].links):
-                        node_tree.links.new(mapping_node.outputs[0], coord_links.to_socket)
-                    node_tree.nodes.remove(decal_inputs)
-                    decal_material_nodes.remove(decal_inputs)
-
-                return tex_coords_node
-
-            decal_tex_coords_node = replace_decal_inputs()
-
-            # move decal material nodes to a proper location
-            def place_copied_nodes():
-                nonlocal ofs
-                (min_x, min_y, max_x, max_y) = calc_nodes_bounds(decal_material_nodes)
-                move_nodes(decal_material_nodes, -min_x + ofs, -max_y - 200)
-                ofs += 200 + (max_x - min_x)
-
-            place_copied_nodes()
-
-            # replace .__DecalOutput with mix nodes
-            def replace_decal_outputs():
-                nonlocal prev_output
-                decal_outputs = [x for x in cast(list[NodeGroup], decal_material_nodes) if
-                                 x.type == "GROUP" and
-                                 x.node_tree and
-                                 x.node_tree.name == ".__DecalOutput"][0]
-
-                def try_relink(source: NodeSocket, target: NodeSocket):
-                    if len(source.links) == 0:
-                        if type(source.default_value) is float and type(target.default_value) is not float:
-                            target.default_value = [source.default_value] * 4
-                        else:
-                            target.default_value = source.default_value
-                    else:
-                        node_tree.links.new(source.links[0].from_node.outputs[get_socket_index(source.links[0].from_socket)], target)
-
-                # additional alpha masks
-                alpha_mask_output = None
-                projector_type: str = props.id_data.empty_display_type
-                if projector_type == "CUBE":
-                    abs_node = create_node("ShaderNodeVectorMath")
-                    abs_node.operation = "ABSOLUTE"
-                    node_tree.links.new(decal_tex_coords_node.outputs["Object"], abs_node.inputs[0])
-
-                    sep_node = create_node("ShaderNodeSeparateXYZ")
-                    node_tree.links.new(abs_node.outputs[0], sep_node.inputs[0])
-
-                    xy_max_node = create_node("ShaderNodeMath")
-                    xy_max_node.operation = "MAXIMUM"
-                    node_tree.links.new(sep_node.outputs[0], xy_max_node.inputs[0])
-                    node_tree.links.new(sep_node.outputs[1], xy_max_node.inputs[1])
-
-                    if props.fade_out > 0:  # fade out enabled
-                        less_cmp_node = create_node("ShaderNodeMath")
-                        less_cmp_node.operation = "LESS_THAN"
-                        node_tree.links.new(xy_max_node.outputs[0], less_cmp_node.inputs[0])
-                        less_cmp_node.inputs[1].default_value = 1
-
-                        range_node = create_node("ShaderNodeMapRange")
-                        range_node.data_type = "FLOAT"
-                        range_node.interpolation_type = "SMOOTHERSTEP"
-                        node_tree.links.new(sep_node.outputs[2], range_node.inputs[0])
-                        range_node.inputs[1].default_value = 1
-                        range_node.inputs[2].default_value = 1 + props.fade_out
-                        range_node.inputs[3].default_value = 1
-                        range_node.inputs[4].default_value = 0
-
-                        min_node = create_node("ShaderNodeMath")
-                        min_node.operation = "MINIMUM"
-                        node_tree.links.new(less_cmp_node.outputs[0], min_node.inputs[0])
-                        node_tree.links.new(range_node.outputs[0], min_node.inputs[1])
-
-                        alpha_mask_output = min_node.outputs[0]
-                    else:
-                        yz_max_node = create_node("ShaderNodeMath")
-                        yz_max_node.operation = "MAXIMUM"
-                        node_tree.links.new(xy_max_node.outputs[0], yz_max_node.inputs[0])
-                        node_tree.links.new(sep_node.outputs[2], yz_max_node.inputs[1])
-
-                        less_cmp_node = create_node("ShaderNodeMath")
-                        less_cmp_node.operation = "LESS_THAN"
-                        node_tree.links.new(yz_max_node.outputs[0], less_cmp_node.inputs[0])
-                        less_cmp_node.inputs[1].default_value = 1
-
-                        alpha_mask_output = less_cmp_node.outputs[0]
-                elif projector_type == "SPHERE":
-                    length_node = create_node("ShaderNodeVectorMath")
-                    length_node.operation = "LENGTH"
-                    node_tree.links.new(decal_tex_coords_node.outputs["Object"], length_node.inputs[0])
-
-                    if props.fade_out > 0:  # fade out enabled
-                        range_node = create_node("ShaderNodeMapRange")
-                        range_node.data_type = "FLOAT"
-                        range_node.interpolation_type = "SMOOTHERSTEP"
-                        node_tree.links.new(length_node.outputs["Value"], range_node.inputs[0])
-                        range_node.inputs[1].default_value = 1
-                        range_node.inputs[2].default_value = 1 + props.fade_out
-                        range_node.inputs[3].default_value = 1
-                        range_node.inputs[4].default_value = 0
-
-                        alpha_mask_output = range_node.outputs[0]
-                    else:
-                        less_cmp_node = create_node("ShaderNodeMath")
-                        less_cmp_node.operation = "LESS_THAN"
-                        node_tree.links.new(length_node.outputs["Value"], less_cmp_node.inputs[0])
-                        less_cmp_node.inputs[1].default_value = 1
-
-                        alpha_mask_output = less_cmp_node.outputs[0]
-
-                mix_node = create_node("ShaderNodeMixShader" if channel_type == "SHADER" else "ShaderNodeMixRGB")
-                node_tree.links.new(prev_output, mix_node.inputs[1])
-
-                # output
-                try_relink(decal_outputs.inputs[0], mix_node.inputs[2])
-
-                if alpha_mask_output:
-                    alpha_mix_node = create_node("ShaderNodeMixRGB")
-                    alpha_mix_node.blend_type = "MULTIPLY"
-                    alpha_mix_node.inputs[0].default_value = 1
-                    try_relink(decal_outputs.inputs[1], alpha_mix_node.inputs[1])
-                    node_tree.links.new(alpha_mask_output, alpha_mix_node.inputs[2])
-                    node_tree.links.new(alpha_mix_node.outputs[0],  mix_node.inputs[0])
-                else:
-                    try_relink(decal_outputs.inputs[1], mix_node.inputs[0])
-
-                prev_output = mix_node.outputs[0]
-                node_tree.nodes.remove(decal_outputs)
-
-            replace_decal_outputs()
-
-        group_output = create_node("NodeGroupOutput")
-
-        node_tree.links.new(prev_output, group_output.inputs[0])
-
-
-@persistent
-def on_depsgraph_update(self):
-    ensure_predefined_node_groups_exists()
-
-    # check if we can skip the update
-    depsgraph: Depsgraph = bpy.context.evaluated_depsgraph_get()
-    updates: list[DepsgraphUpdate] = depsgraph.updates
-
-    should_update = False
-
-    for x in [x for x in updates if type(x.id) == Material]:
-        should_update |= not get_material_type(x.id).startswith("INVALID")
-
-    for x in [x for x in updates if type(x.id) == Object]:
-        should_update |= x.id.type == "EMPTY" and not (
-            x.is_updated_transform and
-            not x.is_updated_geometry and
-            not x.is_updated_shading
-        )
-        should_update |= x.id.name not in depsgraph.view_layer_eval.objects
-
-    # more?
-
-    if not should_update:
-        return
+def get_target_id(props: DecalProjectorTargetProperties) -> str:
+    # a projector may target the same channel more than once, its targets are told apart by their index
+    projector = props.id_data
+    pointer = props.as_pointer()
+    index = next(i for i, x in enumerate(get_decal_projector_props(projector).targets) if x.as_pointer() == pointer)
+    return f"{len(projector.name)}|{projector.name}|{index}"
 
-    print("-"*32)
-    print("regenerating decal groups...")
-    print("-"*32)
-    print("caused by:")
-    for update in set([x for x in updates]):
-        print(f"{update.id} (g: {update.is_updated_geometry}, s: {update.is_updated_shading}, t: {update.is_updated_transform})")
-    print("-"*32)
 
-    generate_nodes()
+def get_node_key(kind: str, target: str, name: str) -> str:
+    # unambiguous whatever characters the names contain
+    return f"{kind}|{len(target)}|{target}|{name}"
 
 
-def register():
-    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+# a socket of the graph as (node key, socket index), or an unlinked default value
+DecalOutput = tuple[Optional[tuple[str, int]], Any]
 
 
-def unregister():
-    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+def add_material_nodes(graph: GraphIR, target: str, material: Material, input_socket: tuple[str, int], ofs: float,
+                       patch: MaterialPatch) -> tuple[list[DecalOutput], list[str], float]:
+    # clone the decal material into the graph, with its decal inputs replaced by the given socket.
+    # returns what is connected to the decal outputs, keys of the cloned nodes, and their width
+    source_tree = material.node_tree
+    fingerprints = get_node_fingerprints(material)
+    decal_inputs = set(x.name for x in find_group_nodes(source_tree.nodes, ".__DecalInput"))
+    decal_output = get_decal_output_node(material)
+    nodes = [x for x in source_tree.nodes if x.name not in decal_inputs and x != decal_output]
+    (min_x, min_y, max_x, max_y) = calc_nodes_bounds(nodes) if len(nodes) > 0 else (0, 0, 0, 0)
+
+    def get_key(node: Node) -> str:
+        return get_node_key("material", target, node.name)
+
+    keys = []
+    socket_indices: dict[int, int] = {}
+    for node in nodes:
+        key = get_key(node)
+        record = graph.add_node(key, node.bl_idname, (node.location.x - min_x + ofs, node.location.y - max_y - 200))
+        record.source = (material.name, node.name)
+        record.fingerprint = fingerprints[node.name]
+        for is_output, sockets in [(False, node.inputs), (True, node.outputs)]:
+            for i, socket in enumerate(sockets):
+                socket_indices[socket.as_pointer()] = i
+                if hasattr(socket, "default_value"):
+                    record.values[(is_output, i)] = get_plain_default(socket)
+        if node.type == "TEX_IMAGE" and node.image is not None:
+            record.ids["image"] = ("images", node.image.name)
+        patch.node_names[node.name] = key
+        keys.append(key)
+
+    def get_from_socket(link: NodeLink) -> Optional[tuple[str, int]]:
+        if link.from_node.name in decal_inputs:
+            return input_socket
+        index = socket_indices.get(link.from_socket.as_pointer())
+        return None if index is None else (get_key(link.from_node), index)
+
+    for link in source_tree.links:
+        if link.to_node == decal_output or link.to_node.name in decal_inputs:
+            continue
+        from_socket = get_from_socket(link)
+        to_index = socket_indices.get(link.to_socket.as_pointer())
+        if from_socket is not None and to_index is not None:
+            graph.link(*from_socket, get_key(link.to_node), to_index, link.is_muted)
+
+    outputs: list[DecalOutput] = []
+    for socket in decal_output.inputs[:2]:
+        if socket.is_linked:
+            outputs.append((get_from_socket(socket.links[0]), None))
+        else:
+            outputs.append((None, get_plain_default(socket)))
+    return (outputs, keys, max_x - min_x)
+
+
+def build_receiver_graph(channel_type: str, projector_props_list: list[DecalProjectorTargetProperties], preview: bool,
+                         atlas_regions: dict[str, AtlasRegion]) -> Generator[None, None, tuple[GraphIR, TreePatches]]:
+    # the desired receiver graph, with patches refering to node keys. a step for each projector
+    graph = GraphIR()
+    patches = TreePatches()
+
+    mark = graph.add_node("mark", "NodeFrame")
+    mark.attrs = [("label", T("generated_node_mark")), ("width", 480), ("height", 0)]
+
+    if len(projector_props_list) == 0:
+        # create default nodes
+        graph.add_node("input", "NodeGroupInput", (0, -50))
+        graph.add_node("output", "NodeGroupOutput", (200, -50))
+        graph.link("input", 0, "output", 0)
+        return (graph, patches)
+
+    ofs = 0
+
+    def add_node(key: str, bl_idname: str) -> NodeRecord:
+        nonlocal ofs
+        record = graph.add_node(key, bl_idname, (ofs, -50))
+        ofs += 200
+        return record
+
+    add_node("input", "NodeGroupInput")
+
+    share_material_groups = get_decal_channels_props().share_material_groups
+
+    # loop over projectors
+    prev_output = ("input", 0)
+    for props in projector_props_list:
+        projector = props.id_data.name
+        target = get_target_id(props)
+        material_patch = MaterialPatch()
+
+        # decal coordinates
+        tex_coords_key = get_node_key("decal", target, "tex_coords")
+        tex_coords_node = add_node(tex_coords_key, "ShaderNodeTexCoord")
+        tex_coords_node.ids["object"] = ("objects", projector)
+
+        mapping_key = get_node_key("decal", target, "mapping")
+        mapping_node = add_node(mapping_key, "ShaderNodeMapping")
+        mapping_node.attrs = [("vector_type", "POINT")]
+        mapping_node.values[(False, 1)] = (0.5, 0.5, 0.5)
+        mapping_node.values[(False, 2)] = (0.0, 0.0, 0.0)
+        mapping_node.values[(False, 3)] = (0.5, 0.5, 0.5)
+        graph.link(tex_coords_key, 3, mapping_key, 0)  # object coordinates
+
+        # decal material nodes
+        if share_material_groups:
+            material_key = get_node_key("decal", target, "material")
+            material_node = add_node(material_key, "ShaderNodeGroup")
+            with measure("clone"):
+                material_node.ids["node_tree"] = ("node_groups", ensure_material_group(props.material, channel_type).name)
+            graph.link(mapping_key, 0, material_key, 0)
+            decal_outputs: list[DecalOutput] = [((material_key, 0), None), ((material_key, 1), None)]
+        else:
+            (decal_outputs, material_keys, width) = add_material_nodes(graph, target, props.material, (mapping_key, 0), ofs,
+                                                                       material_patch)
+            ofs += 200 + width
+            if atlas_regions:
+                apply_atlas(graph, material_keys, atlas_regions)
+            if preview:
+                apply_proxy_images(graph, material_keys)
+
+        def link_decal_output(index: int, target_key: str, target_index: int, is_color: bool):
+            (socket, value) = decal_outputs[index]
+            if socket is not None:
+                graph.link(*socket, target_key, target_index)
+            elif value is not None:
+                graph.nodes[target_key].values[(False, target_index)] = (value,) * 4 if is_color and type(value) is float else value
+                material_patch.outputs.append((index, target_key, False, target_index))
+
+        # additional alpha masks, previews are only clipped without fading
+        fade_out = 0 if preview else props.fade_out
+        mask_key = None
+        with measure("mask"):
+            mask_group = bpy.data.node_groups.get(mask_group_names.get(props.id_data.empty_display_type, ""))
+            if mask_group is not None:
+                mask_key = get_node_key("decal", target, "mask")
+                mask_node = add_node(mask_key, "ShaderNodeGroup")
+                mask_node.ids["node_tree"] = ("node_groups", mask_group.name)
+                mask_node.values[(False, 1)] = fade_out
+                graph.link(tex_coords_key, 3, mask_key, 0)
+                if not preview:
+                    patches.fade_out_nodes.setdefault(target, []).append(mask_key)
+
+        # mix with the previous output
+        mix_key = get_node_key("decal", target, "mix")
+        add_node(mix_key, "ShaderNodeMixShader" if channel_type == "SHADER" else "ShaderNodeMixRGB")
+        graph.link(*prev_output, mix_key, 1)
+        link_decal_output(0, mix_key, 2, channel_type == "RGBA")
+
+        if mask_key is not None:
+            alpha_mix_key = get_node_key("decal", target, "alpha_mix")
+            alpha_mix_node = add_node(alpha_mix_key, "ShaderNodeMixRGB")
+            alpha_mix_node.attrs = [("blend_type", "MULTIPLY")]
+            alpha_mix_node.values[(False, 0)] = 1.0
+            link_decal_output(1, alpha_mix_key, 1, True)
+            graph.link(mask_key, 0, alpha_mix_key, 2)
+            graph.link(alpha_mix_key, 0, mix_key, 0)
+        else:
+            link_decal_output(1, mix_key, 0, False)
+
+        prev_output = (mix_key, 0)
+
+        if not share_material_groups:
+            patches.material_nodes.setdefault(props.material.name, []).append(material_patch)
+        yield
+
+    add_node("output", "NodeGroupOutput")
+    graph.link(*prev_output, "output", 0)
+    return (graph, patches)
+
+
+def resolve_patches(patches: TreePatches, nodes: dict[str, Node]):
+    # node keys -> names of the nodes they got applied to
+    for target, keys in patches.fade_out_nodes.items():
+        patches.fade_out_nodes[target] = [nodes[x].name for x in keys]
+    for material_patches in patches.material_nodes.values():
+        for patch in material_patches:
+            patch.node_names = {k: nodes[v].name for k, v in patch.node_names.items() if v in nodes}
+            patch.outputs = [(index, nodes[key].name, is_output, socket_index) for index, key, is_output, socket_index in patch.outputs]
+
+
+def generate_receiver_nodes(node_tree: NodeTree, channel_type: str, projector_props_list: list[DecalProjectorTargetProperties],
+                            preview: bool = False, atlas_regions: Optional[dict[str, AtlasRegion]] = None
+                            ) -> Generator[None, None, TreePatches]:
+    def setup_sockets(sockets):
+        while len(sockets) > 1:
+            sockets.remove(sockets[-1])
+        if len(sockets) > 0 and sockets[0].type == channel_type:
+            return
+        else:
+            sockets.clear()
+            sockets.new("NodeSocketColor" if channel_type == "RGBA" else "NodeSocketShader", "Input")
+
+    setup_sockets(node_tree.inputs)
+    setup_sockets(node_tree.outputs)
+
+    (graph, patches) = yield from measure_steps("build", build_receiver_graph(channel_type, projector_props_list, preview,
+                                                                              atlas_regions or {}))
+    yield
+    with measure("apply"):
+        (nodes, stats) = apply_graph(node_tree, graph)
+    log("DEBUG", f"{node_tree.name}: {stats.created} nodes created, {stats.removed} removed, {stats.kept} kept, "
+        f"{stats.links_added} links added, {stats.links_removed} removed")
+
+    resolve_patches(patches, nodes)
+    return patches
+
+
+def clear_material_caches():
+    compiled_material_groups.clear()
+    material_fingerprints.clear()
+    material_types.clear()
+
+
+def reset_generation_state():
+    channel_states.clear()
+    stale_channels.clear()
+    clear_index()
+    compiled_material_patches.clear()
+    clear_material_caches()
+    clear_receiver_geometry()
+    clear_estimates()
+    clear_atlases()
+    clear_applied_graphs()
@@ -0,0 +1,199 @@
+import bpy
+import time
+from bpy.types import Operator
+from typing import Generator, Optional
+from .material_decal_property import get_decal_channels_props, get_decal_projector_props
+from .material_decal_index import get_projectors
+from .material_decal_fingerprint import get_material_fingerprints, get_node_fingerprints, material_fingerprints
+from .material_decal_node_generator import GenerationInput, begin_generation, finish_generation, generate_channel_steps, stale_channels
+from .material_decal_gc import collect_garbage
+from .material_decal_stats import begin_run, end_run, log, measure, pause_run, resume_run
+from .material_decal_localization import T
+
+# time spent on the job before giving control back to blender, at least one material or step is done per tick
+apply_budget = 0.02
+
+
+class GenerationJob:
+    # a generation run spread over timer ticks: the uncached decal materials fingerprinted a few at a time,
+    # then the channels generated step by step, a projector added to a graph or a tree applied at a time
+    __slots__ = ("dirty_channels", "force", "materials", "input", "channels", "steps", "total")
+
+    def __init__(self, dirty_channels: Optional[set[str]], force: bool):
+        self.dirty_channels = dirty_channels
+        self.force = force
+        self.materials: list[str] = []  # not fingerprinted yet
+        self.input: Optional[GenerationInput] = None
+        self.channels: list[str] = []  # not applied yet, the first one is in progress if there are steps
+        self.steps: Optional[Generator[None, None, None]] = None
+        self.total = 0
+
+
+job: Optional[GenerationJob] = None
+
+
+def is_generation_running() -> bool:
+    return job is not None
+
+
+def get_generation_progress() -> tuple[int, int]:
+    # (applied channels, channels), both zero while preparing
+    if job is None or job.input is None:
+        return (0, 0)
+    return (job.total - len(job.channels), job.total)
+
+
+def redraw_panels():
+    for window in bpy.context.window_manager.windows:
+        for area in [x for x in window.screen.areas if x.type == "VIEW_3D"]:
+            area.tag_redraw()
+
+
+def collect_uncached_materials(dirty_channels: Optional[set[str]]) -> list[str]:
+    # decal materials of the dirty channels whose fingerprints aren't cached
+    materials = set()
+    for projector in get_projectors():
+        for target in get_decal_projector_props(projector).targets:
+            if target.material is not None and (dirty_channels is None or target.name in dirty_channels):
+                materials.add(target.material.name)
+    return sorted(x for x in materials if x not in material_fingerprints)
+
+
+def start_generation_job(dirty_channels: Optional[set[str]], force: bool, trigger: str):
+    global job
+    cancel_generation_job()
+    begin_run(trigger)
+    job = GenerationJob(dirty_channels, force)
+    job.materials = collect_uncached_materials(dirty_channels)
+    bpy.app.timers.register(on_job_timer, first_interval=0)
+    pause_run()
+
+
+def fingerprint_job_materials(job: GenerationJob, budget: float):
+    # walking the node trees is most of the cost of a run with cold caches
+    deadline = time.perf_counter() + budget
+    with measure("fingerprint"):
+        while len(job.materials) > 0:
+            material = bpy.data.materials.get(job.materials.pop(0))
+            if material is not None:
+                get_material_fingerprints(material)
+                if material.use_nodes:
+                    get_node_fingerprints(material)
+            if time.perf_counter() > deadline:
+                break
+
+
+def prepare_job(job: GenerationJob):
+    # the scene hasn't changed since the job started, as any update cancels it
+    job.input = begin_generation(job.dirty_channels, job.force)
+    job.channels = [x.name for x in get_decal_channels_props().decal_channels]
+    job.total = len(job.channels)
+    bpy.context.window_manager.progress_begin(0, max(job.total, 1))
+
+
+def apply_job(job: GenerationJob, budget: float):
+    deadline = time.perf_counter() + budget
+    while len(job.channels) > 0:
+        if job.steps is None:
+            job.steps = generate_channel_steps(job.input, job.channels[0])
+        try:
+            next(job.steps)
+        except StopIteration:
+            job.steps = None
+            job.channels.pop(0)
+        if time.perf_counter() > deadline:
+            break
+    bpy.context.window_manager.progress_update(job.total - len(job.channels))
+
+
+def end_job(collect: bool):
+    global job
+    if job.steps is not None:
+        job.steps.close()
+    if job.input is not None:
+        finish_generation()
+        bpy.context.window_manager.progress_end()
+    if collect:
+        with measure("gc"):
+            collect_garbage()
+    job = None
+    end_run()
+    redraw_panels()
+
+
+def on_job_timer():
+    if job is None:
+        return None
+    resume_run()
+    try:
+        if job.input is None:
+            fingerprint_job_materials(job, apply_budget)
+            if len(job.materials) > 0:
+                return 0.001
+            prepare_job(job)
+        apply_job(job, apply_budget)
+        redraw_panels()
+        if len(job.channels) > 0:
+            return 0.001
+        end_job(True)
+    except Exception:
+        cancel_generation_job()
+        raise
+    finally:
+        pause_run()
+    return None
+
+
+def cancel_generation_job() -> tuple[bool, Optional[set[str]]]:
+    # stop between two steps. returns whether a job was running,
+    # and the channels it didn't finish, or None for all of them
+    if job is None:
+        return (False, set())
+    if bpy.app.timers.is_registered(on_job_timer):
+        bpy.app.timers.unregister(on_job_timer)
+    remaining = job.dirty_channels if job.input is None else set(job.channels)
+    log("INFO", f"generation cancelled, {'all' if remaining is None else len(remaining)} channels left")
+    end_job(False)
+    return (True, remaining)
+
+
+def finish_generation_job():
+    # apply what's left right away, for renders and saves
+    if job is None:
+        return
+    if bpy.app.timers.is_registered(on_job_timer):
+        bpy.app.timers.unregister(on_job_timer)
+    resume_run()
+    try:
+        if job.input is None:
+            prepare_job(job)
+        apply_job(job, float("inf"))
+        end_job(True)
+    except Exception:
+        cancel_generation_job()
+        raise
+
+
+class DECAL_OT_cancel_generation(Operator):
+    bl_idname = "material_decals.cancel_generation"
+    bl_label = T("cancel_generation")
+    bl_description = T("cancel_generation_desc")
+
+    @classmethod
+    def poll(cls, context):
+        return is_generation_running()
+
+    def execute(self, context):
+        (_, remaining) = cancel_generation_job()
+        stale_channels.update(x.name for x in get_decal_channels_props().decal_channels if remaining is None or x.name in remaining)
+
+        return {'FINISHED'}
+
+
+def unregister():
+    cancel_generation_job()
+
+
+classes = (
+    DECAL_OT_cancel_generation,
+)
@@ -0,0 +1,79 @@
+import bpy
+from bpy.types import Image
+from mathutils import Vector
+from .material_decal_property import DecalProjectorTargetProperties, get_decal_channels_props
+from .material_decal_graph import GraphIR
+
+# set while rendering or baking, so the full graphs are generated regardless of the preview setting
+full_quality = False
+
+
+def set_full_quality(value: bool):
+    global full_quality
+    full_quality = value
+
+
+def is_full_quality() -> bool:
+    return full_quality
+
+
+def is_preview_active() -> bool:
+    return get_decal_channels_props().use_preview and not full_quality
+
+
+def get_view_locations() -> list[Vector]:
+    locations = []
+    for window in bpy.context.window_manager.windows:
+        for area in [x for x in window.screen.areas if x.type == "VIEW_3D"]:
+            locations.append(area.spaces.active.region_3d.view_matrix.inverted().translation)
+    return locations
+
+
+def select_preview_projectors(projector_props_list: list[DecalProjectorTargetProperties]) -> list[DecalProjectorTargetProperties]:
+    # keep the projectors nearest to any viewport, in their original order
+    count = get_decal_channels_props().preview_projector_count
+    locations = get_view_locations()
+    if count <= 0 or len(projector_props_list) <= count or len(locations) == 0:
+        return projector_props_list
+
+    def get_distance(props: DecalProjectorTargetProperties) -> float:
+        location = props.id_data.matrix_world.translation
+        return min((location - x).length_squared for x in locations)
+
+    nearest = set(id(x) for x in sorted(projector_props_list, key=get_distance)[:count])
+    return [x for x in projector_props_list if id(x) in nearest]
+
+
+def get_proxy_image_name(image: Image) -> str:
+    return ".__DecalProxy " + image.name
+
+
+def get_proxy_image(image: Image, max_size: int) -> Image:
+    (width, height) = image.size
+    if width <= max_size and height <= max_size:
+        return image
+    scale = max_size / max(width, height)
+    size = (max(int(width * scale), 1), max(int(height * scale), 1))
+
+    proxy = bpy.data.images.get(get_proxy_image_name(image))
+    if proxy is not None and tuple(proxy.size) == size:
+        return proxy
+    if proxy is not None:
+        bpy.data.images.remove(proxy)
+    proxy = image.copy()
+    proxy.name = get_proxy_image_name(image)
+    proxy.scale(*size)
+    return proxy
+
+
+def apply_proxy_images(graph: GraphIR, keys: list[str]):
+    max_size = get_decal_channels_props().preview_image_size
+    for record in [graph.nodes[x] for x in keys]:
+        image = bpy.data.images.get(record.ids["image"][1]) if "image" in record.ids else None
+        if image is not None and image.size[0] > 0:  # skip images failed to load
+            record.ids["image"] = ("images", get_proxy_image(image, max_size).name)
+
+
+def remove_proxy_images():
+    for image in [x for x in bpy.data.images if x.name.startswith(".__DecalProxy ") and x.users == 0]:
+        bpy.data.images.remove(image)
@@ -2,6 +2,9 @@ import bpy
 from bpy.types import Operator, Object, UIList, UILayout, Panel, Menu, Context, VIEW3D_MT_make_links
 from .material_decal_property import get_decal_channels_props, get_decal_projector_props
 from .material_decal_material import get_material_type
+from .material_decal_index import update_projector_registry
+from .material_decal_complexity import estimate_material, get_channel_estimate, get_exceeded_budgets
+from .material_decal_channel import draw_complexity
 from .material_decal_localization import T
 
 
@@ -25,6 +28,7 @@ class DECAL_OT_copy_projector_target(Operator):
                 new_target.fade_out = target.fade_out
                 new_target.material = target.material
                 new_target.name = target.name
+            update_projector_registry(object)
             object.update_tag(refresh={"DATA"})
         return {'FINISHED'}
 
@@ -39,6 +43,7 @@ class DECAL_OT_add_projector_target(Operator):
         o = props.targets.add()
         o.name = "New Target"
         props.active_target = len(props.targets) - 1
+        update_projector_registry(context.object)
 
         return {'FINISHED'}
 
@@ -57,6 +62,7 @@ class DECAL_OT_remove_projector_target(Operator):
         props = get_decal_projector_props(context.object)
         props.targets.remove(props.active_target)
         props.active_target = max(props.active_target - 1, 0)
+        update_projector_registry(context.object)
 
         return {'FINISHED'}
 
@@ -162,6 +168,39 @@ class DECAL_PT_projector(Panel):
             draw_channel_status()
 
 
+class DECAL_PT_projector_complexity(Panel):
+    bl_space_type = "PROPERTIES"
+    bl_region_type = "WINDOW"
+    bl_context = "data"
+    bl_label = T("projector_complexity")
+    bl_parent_id = "DECAL_PT_projector"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return len(get_decal_projector_props(context.object).targets) > 0
+
+    def draw(self, context):
+        layout = self.layout
+
+        # what each target adds to its channel, next to the channel total
+        for target in get_decal_projector_props(context.object).targets:
+            channel = get_channel_estimate(target.name)
+            over_budget = channel is not None and len(get_exceeded_budgets(channel)) > 0
+            box = layout.box()
+            box.label(text=target.name, icon="ERROR" if over_budget else get_target_status_icon(context.object, target.name))
+
+            estimate = estimate_material(target.material)
+            if estimate is not None:
+                row = box.row()
+                row.label(text=T("decal_material", ":"))
+                share = f" ({estimate.nodes / channel.nodes * 100:.0f}%)" if channel is not None and channel.nodes > 0 else ""
+                row.label(text=T("complexity_estimate").format(nodes=estimate.nodes, samplers=estimate.samplers,
+                                                               bsdfs=estimate.bsdfs, depth=estimate.depth) + share)
+            box.label(text=T("decal_channels", ":"))
+            draw_complexity(box, channel)
+
+
 def menu_copy_projector_settings(self: Menu, context: Context):
     layout = self.layout
     layout.separator()
@@ -182,4 +221,5 @@ classes = (
     DECAL_OT_remove_projector_target,
     DECAL_UL_projector_target,
     DECAL_PT_projector,
+    DECAL_PT_projector_complexity,
 )
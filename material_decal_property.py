@@ -18,8 +18,9 @@ if TYPE_CHECKING:
 
 
 def depsgraph_update(self, context):
-    for o in [x for x in bpy.data.materials]:
-        o.update_tag(refresh=set())
+    # channel settings aren't tracked by the depsgraph, check every channel against its fingerprint
+    from .material_decal_update import request_regeneration
+    request_regeneration()
 
 
 def on_channel_rename(self, context):
@@ -32,21 +33,79 @@ class DecalChannelProperties(PropertyGroup):
     if TYPE_CHECKING:
         name: str
         type: Literal["SHADER", "RGBA"]
+        use_receiver_culling: bool
+        use_atlas: bool
+        backend: Literal["NODES", "MESH"]
+        mesh_offset: float
     else:
         name: bpy.props.StringProperty(update=on_channel_rename, name=T("channel_name"))
         type: bpy.props.EnumProperty(update=depsgraph_update, name=T("decal_type"), items=[
             ("SHADER", "Shader", "Shader"),
             ("RGBA", "Color", "Color"),
         ])
+        use_receiver_culling: bpy.props.BoolProperty(update=depsgraph_update, name=T("receiver_culling"),
+                                                     description=T("receiver_culling_desc"))
+        use_atlas: bpy.props.BoolProperty(update=depsgraph_update, name=T("use_atlas"), description=T("use_atlas_desc"))
+        backend: bpy.props.EnumProperty(update=depsgraph_update, name=T("backend"), description=T("backend_desc"), items=[
+            ("NODES", "Nodes", "Nodes"),
+            ("MESH", "Mesh", "Mesh"),
+        ])
+        mesh_offset: bpy.props.FloatProperty(update=depsgraph_update, min=0, default=0.001, precision=4, subtype="DISTANCE",
+                                             unit="LENGTH", name=T("mesh_offset"), description=T("mesh_offset_desc"))
 
 
 class DecalChannelsRuntimeProperties(PropertyGroup):
     if TYPE_CHECKING:
         decal_channels: Collection[DecalChannelProperties]
         active_channel: int
+        share_material_groups: bool
+        regeneration_delay: float
+        defer_during_playback: bool
+        use_async_generation: bool
+        use_preview: bool
+        preview_projector_count: int
+        preview_image_size: int
+        atlas_max_size: int
+        atlas_padding: int
+        log_level: Literal["NONE", "INFO", "DEBUG"]
+        stats_log_path: str
+        budget_nodes: int
+        budget_samplers: int
+        budget_bsdfs: int
+        budget_depth: int
+        manifest: str
     else:
         decal_channels: bpy.props.CollectionProperty(type=DecalChannelProperties, name=T("decal_material"))
         active_channel: bpy.props.IntProperty(update=depsgraph_update)
+        share_material_groups: bpy.props.BoolProperty(update=depsgraph_update, name=T("share_material_groups"),
+                                                      description=T("share_material_groups_desc"))
+        regeneration_delay: bpy.props.FloatProperty(min=0, default=0.25, subtype="TIME", unit="TIME", name=T("regeneration_delay"),
+                                                    description=T("regeneration_delay_desc"))
+        defer_during_playback: bpy.props.BoolProperty(default=True, name=T("defer_during_playback"),
+                                                      description=T("defer_during_playback_desc"))
+        use_async_generation: bpy.props.BoolProperty(default=True, name=T("use_async_generation"),
+                                                     description=T("use_async_generation_desc"))
+        use_preview: bpy.props.BoolProperty(update=depsgraph_update, name=T("use_preview"), description=T("use_preview_desc"))
+        preview_projector_count: bpy.props.IntProperty(update=depsgraph_update, min=0, default=16, name=T("preview_projector_count"),
+                                                       description=T("preview_projector_count_desc"))
+        preview_image_size: bpy.props.IntProperty(update=depsgraph_update, min=8, default=256, subtype="PIXEL", name=T("preview_image_size"),
+                                                  description=T("preview_image_size_desc"))
+        atlas_max_size: bpy.props.IntProperty(update=depsgraph_update, min=256, max=16384, default=4096, subtype="PIXEL",
+                                              name=T("atlas_max_size"), description=T("atlas_max_size_desc"))
+        atlas_padding: bpy.props.IntProperty(update=depsgraph_update, min=0, max=64, default=4, subtype="PIXEL",
+                                             name=T("atlas_padding"))
+        log_level: bpy.props.EnumProperty(name=T("log_level"), default="NONE", items=[
+            ("NONE", "None", "None"),
+            ("INFO", "Info", "Info"),
+            ("DEBUG", "Debug", "Debug"),
+        ])
+        stats_log_path: bpy.props.StringProperty(subtype="FILE_PATH", name=T("stats_log_path"),
+                                                 description=T("stats_log_path_desc"))
+        budget_nodes: bpy.props.IntProperty(min=0, default=2000, name=T("budget_nodes"), description=T("budget_desc"))
+        budget_samplers: bpy.props.IntProperty(min=0, default=20, name=T("budget_samplers"), description=T("budget_samplers_desc"))
+        budget_bsdfs: bpy.props.IntProperty(min=0, default=16, name=T("budget_bsdfs"), description=T("budget_desc"))
+        budget_depth: bpy.props.IntProperty(min=0, default=200, name=T("budget_depth"), description=T("budget_desc"))
+        manifest: bpy.props.StringProperty(options={'HIDDEN'})  # what the saved groups were generated from, as json
 
     def get_decal_channel(self, channel: str) -> Optional[DecalChannelProperties]:
         return self.decal_channels[channel] if self.decal_channels.find(channel) >= 0 else None
@@ -0,0 +1,73 @@
+import numpy as np
+from bpy.types import Object
+
+unit_cube_corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+
+
+def get_projector_extents(projector: Object, fade_out: float) -> np.ndarray:
+    # half size of the projected volume in projector space, inf if it is unbounded
+    if projector.empty_display_type == "CUBE":
+        return np.array([1, 1, 1 + fade_out])
+    elif projector.empty_display_type == "SPHERE":
+        return np.full(3, 1 + fade_out)
+    else:
+        return np.full(3, np.inf)
+
+
+def get_matrices(objects: list[Object]) -> np.ndarray:
+    matrices = np.empty((len(objects), 4, 4))
+    for i, object in enumerate(objects):
+        matrices[i] = object.matrix_world
+    return matrices
+
+
+def is_degenerate(matrices: np.ndarray) -> np.ndarray:
+    # scaled to zero along some axis, these can't be inverted and don't project anything
+    return np.abs(np.linalg.det(matrices[..., :3, :3])) < 1e-12
+
+
+def transform_points(matrices: np.ndarray, points: np.ndarray) -> np.ndarray:
+    # (n, 4, 4) x (n, k, 3) -> (n, k, 3)
+    return np.einsum("nij,nkj->nki", matrices[:, :3, :3], points) + matrices[:, np.newaxis, :3, 3]
+
+
+def find_overlaps(projectors: list[Object], extents: list[np.ndarray], receivers: list[Object]) -> np.ndarray:
+    # (projectors, receivers) matrix telling whether the projected volume may touch the receiver.
+    # conservative: an aabb test in world space followed by an aabb test in projector space
+    result = np.zeros((len(projectors), len(receivers)), dtype=bool)
+    if len(projectors) == 0 or len(receivers) == 0:
+        return result
+
+    extents = np.array(extents)
+    unbounded = np.isinf(extents).any(axis=1)
+    result[unbounded] = True
+    bounded = np.nonzero(~unbounded)[0]
+    projector_matrices = get_matrices([projectors[i] for i in bounded])
+    valid = ~is_degenerate(projector_matrices)
+    (bounded, projector_matrices) = (bounded[valid], projector_matrices[valid])
+    if len(bounded) == 0:
+        return result
+
+    projector_corners = transform_points(projector_matrices, unit_cube_corners[np.newaxis] * extents[bounded][:, np.newaxis])
+    projector_min = projector_corners.min(axis=1)
+    projector_max = projector_corners.max(axis=1)
+
+    receiver_matrices = get_matrices(receivers)
+    receiver_corners = transform_points(receiver_matrices, np.array([[tuple(x) for x in r.bound_box] for r in receivers]))
+    receiver_min = receiver_corners.min(axis=1)
+    receiver_max = receiver_corners.max(axis=1)
+
+    # world space
+    candidates = np.all((projector_min[:, np.newaxis] <= receiver_max[np.newaxis]) &
+                        (projector_max[:, np.newaxis] >= receiver_min[np.newaxis]), axis=2)
+    p, r = np.nonzero(candidates)
+    if len(p) == 0:
+        return result
+
+    # projector space
+    local_corners = transform_points(np.linalg.inv(projector_matrices)[p], receiver_corners[r])
+    local_extents = extents[bounded][p]
+    overlap = np.all((local_corners.min(axis=1) <= local_extents) &
+                     (local_corners.max(axis=1) >= -local_extents), axis=1)
+    result[bounded[p[overlap]], r[overlap]] = True
+    return result
@@ -0,0 +1,136 @@
+import bpy
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Generator, Optional
+from .material_decal_property import get_decal_channels_props
+
+log_levels = ["NONE", "INFO", "DEBUG"]
+
+
+class GenerationStats:
+    def __init__(self, trigger: str):
+        self.trigger = trigger
+        self.time = time.time()
+        self.duration = 0.0
+        self.phases: dict[str, float] = {}
+        self.channels: dict[str, tuple[str, int, int]] = {}  # channel -> (result, nodes, links)
+        self.caches: dict[str, list[int]] = {}  # cache -> [hits, misses]
+
+    def to_dict(self) -> dict:
+        return {
+            "time": self.time,
+            "trigger": self.trigger,
+            "duration": self.duration,
+            "phases": self.phases,
+            "channels": {k: {"result": v[0], "nodes": v[1], "links": v[2]} for k, v in self.channels.items()},
+            "caches": self.caches,
+        }
+
+
+history: list[GenerationStats] = []  # most recent last
+current: Optional[GenerationStats] = None
+paused = False  # between the ticks of a background run, what happens then isn't part of it
+session_caches: dict[str, list[int]] = {}
+
+
+def log(level: str, message: str):
+    if log_levels.index(level) <= log_levels.index(get_decal_channels_props().log_level):
+        print("[material decals] " + message)
+
+
+def count_cache(cache: str, hit: bool):
+    # only lookups made by generation count, not the ones of panels drawing
+    if current is None or paused:
+        return
+    i = 0 if hit else 1
+    session_caches.setdefault(cache, [0, 0])[i] += 1
+    current.caches.setdefault(cache, [0, 0])[i] += 1
+
+
+# time spent in the phases nested in each running phase
+nested_durations: list[float] = []
+
+
+@contextmanager
+def measure(phase: str):
+    # phases don't overlap, time spent in a nested phase only counts for that one
+    start = time.perf_counter()
+    nested_durations.append(0.0)
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        nested = nested_durations.pop()
+        if len(nested_durations) > 0:
+            nested_durations[-1] += duration
+        if current is not None:
+            current.phases[phase] = current.phases.get(phase, 0.0) + duration - nested
+
+
+def measure_steps(phase: str, steps: Generator[None, None, Any]) -> Generator[None, None, Any]:
+    # time the steps of a resumable task, without the time spent between them
+    while True:
+        with measure(phase):
+            try:
+                next(steps)
+            except StopIteration as e:
+                return e.value
+        yield
+
+
+def record_channel(channel: str, result: str, node_tree=None):
+    if current is not None:
+        current.channels[channel] = (result,
+                                     len(node_tree.nodes) if node_tree else 0,
+                                     len(node_tree.links) if node_tree else 0)
+
+
+def begin_run(trigger: str):
+    global current, paused
+    current = GenerationStats(trigger)
+    current.duration = time.perf_counter()
+    paused = False
+
+
+def pause_run():
+    global paused
+    paused = True
+
+
+def resume_run():
+    global paused
+    paused = False
+
+
+def end_run():
+    global current
+    stats = current
+    current = None
+    if stats is None:
+        return
+    stats.duration = time.perf_counter() - stats.duration
+
+    history.append(stats)
+    del history[:-20]
+
+    rebuilt = [k for k, v in stats.channels.items() if v[0] == "REBUILT"]
+    log("INFO", f"generated in {stats.duration * 1000:.1f}ms, rebuilt: {', '.join(rebuilt) or '-'} (trigger: {stats.trigger})")
+    log("DEBUG", "phases: " + ", ".join(f"{k} {v * 1000:.1f}ms" for k, v in stats.phases.items()))
+
+    path = get_decal_channels_props().stats_log_path
+    if path:
+        try:
+            with open(bpy.path.abspath(path), "a", encoding="utf-8") as f:
+                f.write(json.dumps(stats.to_dict()) + "\n")
+        except OSError as e:
+            log("INFO", f"failed to write stats log: {e}")
+
+
+def get_last_run() -> Optional[GenerationStats]:
+    return history[-1] if len(history) > 0 else None
+
+
+def get_hit_rate(counters: list[int]) -> float:
+    total = counters[0] + counters[1]
+    return counters[0] / total if total > 0 else 0.0
@@ -0,0 +1,476 @@
+import bpy
+import os
+import time
+from contextlib import contextmanager
+from bpy.types import Operator, Image, Material, Object, Depsgraph, DepsgraphUpdate
+from bpy.app.handlers import persistent
+from typing import Optional
+from .material_decal_property import get_decal_channels_props, get_decal_projector_props
+from .material_decal_material import invalidate_material_type, material_types
+from .material_decal_index import (
+    get_material_channels, get_projector_channels, get_projectors, get_transform_channels, is_index_ready, is_projector,
+    rebuild_projector_registry, update_projector_registry
+)
+from .material_decal_fingerprint import invalidate_material_fingerprint, material_fingerprints
+from .material_decal_node_generator import (
+    ensure_predefined_node_groups_exists, generate_nodes, reset_generation_state, clear_material_caches,
+    compiled_material_groups
+)
+from .material_decal_atlas import get_image_channels, invalidate_atlas_source
+from .material_decal_mesh import clear_receiver_geometry, invalidate_receiver_geometry
+from .material_decal_graph import clear_applied_graphs
+from .material_decal_manifest import load_manifest, save_manifest
+from .material_decal_preview import is_full_quality, set_full_quality
+from .material_decal_pipeline import cancel_generation_job, finish_generation_job, is_generation_running, start_generation_job
+from .material_decal_stats import GenerationStats, get_last_run, log
+from .material_decal_localization import T
+
+# regeneration requests waiting for the scene to become idle, merged into a single run
+pending_channels: set[str] = set()
+pending_triggers: set[str] = set()
+pending_all = False
+last_request_time = 0.0
+
+# set by the render farm mode, updates are ignored until resumed
+suspended = False
+
+# updates during playback and scrubbing, checked once the frame stops changing
+frame_changed = False
+last_frame_change_time = 0.0
+deferred_all = False
+deferred_channels: set[str] = set()
+
+
+def request_regeneration(dirty_channels: Optional[set[str]] = None, trigger: str = "settings"):
+    global pending_all, last_request_time
+    if suspended:
+        return
+    merge_cancelled_generation()
+    if dirty_channels is None:
+        pending_all = True
+    else:
+        pending_channels.update(dirty_channels)
+    pending_triggers.add(trigger)
+    last_request_time = time.monotonic()
+
+    delay = get_decal_channels_props().regeneration_delay
+    if delay <= 0:
+        run_pending_regeneration()
+    elif not bpy.app.timers.is_registered(on_regeneration_timer):
+        bpy.app.timers.register(on_regeneration_timer, first_interval=delay)
+
+
+def has_pending_regeneration() -> bool:
+    return pending_all or len(pending_channels) > 0
+
+
+def cancel_pending_regeneration():
+    global pending_all
+    pending_all = False
+    pending_channels.clear()
+    pending_triggers.clear()
+    if bpy.app.timers.is_registered(on_regeneration_timer):
+        bpy.app.timers.unregister(on_regeneration_timer)
+
+
+def merge_cancelled_generation():
+    # a job interrupted by new changes still has to regenerate what it didn't get to
+    global pending_all
+    (cancelled, remaining) = cancel_generation_job()
+    if not cancelled:
+        return
+    if remaining is None:
+        pending_all = True
+    else:
+        pending_channels.update(remaining)
+
+
+def run_pending_regeneration(force: bool = False, trigger: Optional[str] = None, background: bool = False):
+    # in the background, the run is spread over timer ticks so the ui stays responsive
+    merge_cancelled_generation()
+    dirty_channels = None if pending_all or force else set(pending_channels)
+    triggers = sorted(pending_triggers if trigger is None else pending_triggers | {trigger})
+    cancel_pending_regeneration()
+    trigger = ", ".join(triggers[:8]) + (" ..." if len(triggers) > 8 else "")
+    if background and get_decal_channels_props().use_async_generation and not bpy.app.background:
+        start_generation_job(dirty_channels, force, trigger)
+    else:
+        generate_nodes(dirty_channels, force, trigger)
+
+
+def on_regeneration_timer():
+    # wait until nothing was requested for the whole delay
+    idle = time.monotonic() - last_request_time
+    delay = get_decal_channels_props().regeneration_delay
+    if idle < delay:
+        return delay - idle
+
+    if has_pending_regeneration():
+        run_pending_regeneration(background=True)
+    return None
+
+
+def is_animation_playing() -> bool:
+    return any(x.screen.is_animation_playing for x in bpy.context.window_manager.windows)
+
+
+def defer_regeneration(dirty_channels: Optional[set[str]]):
+    global deferred_all
+    if dirty_channels is None:
+        deferred_all = True
+    else:
+        deferred_channels.update(dirty_channels)
+    if not bpy.app.timers.is_registered(on_playback_timer):
+        bpy.app.timers.register(on_playback_timer, first_interval=0.2)
+
+
+def take_deferred_regeneration() -> Optional[str]:
+    # move what was deferred during playback to the pending regeneration, returns its trigger if there was any
+    global deferred_all, pending_all
+    trigger = None
+    if deferred_all:
+        # animated material values weren't reported, drop what was cached from them
+        material_fingerprints.clear()
+        material_types.clear()
+        clear_receiver_geometry()
+        pending_all = True
+        trigger = "playback stopped"
+    elif len(deferred_channels) > 0:
+        pending_channels.update(deferred_channels)
+        trigger = "scrubbing stopped"
+    deferred_all = False
+    deferred_channels.clear()
+    return trigger
+
+
+def on_playback_timer():
+    if is_animation_playing() or time.monotonic() - last_frame_change_time < 0.2:
+        return 0.2
+
+    trigger = take_deferred_regeneration()
+    if trigger is not None:
+        request_regeneration(set(), trigger)
+    return None
+
+
+def is_transform_only(update: DepsgraphUpdate) -> bool:
+    if type(update.id) == Object:
+        return not update.is_updated_geometry and not update.is_updated_shading
+    return type(update.id) not in [Material, Image]
+
+
+def is_generation_source(update: DepsgraphUpdate) -> bool:
+    # projectors and decal materials, generation itself never edits them
+    if type(update.id) == Material:
+        return any(x.material is not None and x.material.name == update.id.name
+                   for projector in get_projectors() for x in get_decal_projector_props(projector).targets)
+    return type(update.id) == Object and is_projector(update.id.original)
+
+
+@persistent
+def on_frame_change_pre(self, _=None):
+    global frame_changed, last_frame_change_time
+    frame_changed = True
+    last_frame_change_time = time.monotonic()
+
+
+@persistent
+def on_frame_change_post(self, _=None):
+    global last_frame_change_time
+    last_frame_change_time = time.monotonic()
+
+
+@persistent
+def on_depsgraph_update(self):
+    global frame_changed
+    frame_update = frame_changed
+    frame_changed = False
+
+    if get_decal_channels_props().defer_during_playback and (frame_update or deferred_all) and is_animation_playing():
+        # don't even look at the updates until playback stops
+        defer_regeneration(None)
+        return
+
+    ensure_predefined_node_groups_exists()
+
+    # check if we can skip the update
+    depsgraph: Depsgraph = bpy.context.evaluated_depsgraph_get()
+    updates: list[DepsgraphUpdate] = depsgraph.updates
+
+    for x in [x for x in updates if type(x.id) == Object and (x.is_updated_transform or x.is_updated_geometry)]:
+        invalidate_receiver_geometry(x.id.name)
+
+    if frame_update and get_decal_channels_props().defer_during_playback and all(is_transform_only(x) for x in updates):
+        # animated transforms only matter to culled and mesh channels, update them when scrubbing stops
+        affected = set()
+        for x in [x for x in updates if type(x.id) == Object]:
+            affected |= get_transform_channels(x.id.name)
+        if len(affected) > 0:
+            defer_regeneration(affected)
+        return
+
+    for x in [x for x in updates if type(x.id) == Material]:
+        compiled_material_groups.discard(x.id.name)
+        invalidate_material_fingerprint(x.id)
+        invalidate_material_type(x.id)
+
+    if not is_index_ready():
+        # nothing generated in this session yet. the first run reports its own edits here while it's going,
+        # it only has to start over if what it generates from changed
+        for x in [x for x in updates if type(x.id) == Object and x.id.type == "EMPTY"]:
+            update_projector_registry(x.id.original)
+        if not is_generation_running() or any(is_generation_source(x) for x in updates):
+            request_regeneration(trigger="first update")
+        return
+
+    dirty_channels: set[str] = set()
+    triggers: set[str] = set()
+
+    for x in [x for x in updates if type(x.id) == Material]:
+        affected = get_material_channels(x.id.name)
+        if len(affected) > 0:
+            dirty_channels |= affected
+            triggers.add("material " + x.id.name)
+
+    for x in [x for x in updates if type(x.id) == Object]:
+        name = x.id.name
+        projector = get_projector_channels(name)
+        affected = set()
+        if x.id.type == "EMPTY" and not (
+            x.is_updated_transform and
+            not x.is_updated_geometry and
+            not x.is_updated_shading
+        ):
+            update_projector_registry(x.id.original)
+            affected |= projector
+            affected |= set(t.name for t in get_decal_projector_props(x.id).targets)
+        if x.is_updated_transform or x.is_updated_geometry:
+            affected |= get_transform_channels(name)
+        if len(projector) > 0 and name not in depsgraph.view_layer_eval.objects:
+            affected |= projector
+        if len(affected) > 0:
+            dirty_channels |= affected
+            triggers.add("object " + name)
+
+    for x in [x for x in updates if type(x.id) == Image]:
+        name = x.id.name
+        affected = get_image_channels(name)
+        if len(affected) > 0:
+            invalidate_atlas_source(name)
+            dirty_channels |= affected
+            triggers.add("image " + name)
+
+    # more?
+
+    if len(dirty_channels) == 0:
+        return
+
+    log("DEBUG", f"queueing regeneration of {', '.join(sorted(dirty_channels))}, caused by:")
+    for update in set([x for x in updates]):
+        log("DEBUG", f"    {update.id} (g: {update.is_updated_geometry}, s: {update.is_updated_shading}, t: {update.is_updated_transform})")
+
+    # a single request, so a zero delay doesn't run once per trigger
+    pending_triggers.update(triggers)
+    request_regeneration(dirty_channels, sorted(triggers)[0])
+
+
+@persistent
+def on_load_post(self):
+    cancel_generation_job()
+    cancel_pending_regeneration()
+    reset_generation_state()
+    rebuild_projector_registry()
+    if suspended or (bpy.app.background and os.environ.get("MATERIAL_DECALS_RENDER_FARM")):
+        load_manifest()
+        enter_render_farm_mode()
+    elif load_manifest():
+        # only channels whose fingerprints changed since the file was saved get regenerated
+        ensure_predefined_node_groups_exists()
+        generate_nodes(trigger="load")
+
+
+@persistent
+def on_save_pre(self):
+    finish_generation_job()
+    save_manifest()
+
+
+@persistent
+def on_undo_redo(self):
+    # undo restores materials and objects without reporting every one of them as updated.
+    # a running job holds references to data undo just replaced, start it over
+    merge_cancelled_generation()
+    if has_pending_regeneration():
+        request_regeneration(set(), "undo")
+    clear_material_caches()
+    clear_receiver_geometry()
+    clear_applied_graphs()
+    rebuild_projector_registry()
+
+
+def begin_full_quality(trigger: str):
+    # swap in the full graphs, does nothing if they are already there
+    if is_full_quality() or not get_decal_channels_props().use_preview:
+        return
+    set_full_quality(True)
+    cancel_pending_regeneration()
+    generate_nodes(trigger=trigger)
+
+
+def end_full_quality(trigger: str):
+    if not is_full_quality() or suspended:
+        return
+    set_full_quality(False)
+    request_regeneration(trigger=trigger)
+
+
+@contextmanager
+def full_quality_graphs(trigger: str):
+    finish_generation_job()
+    was_full_quality = is_full_quality()
+    begin_full_quality(trigger)
+    try:
+        yield
+    finally:
+        if not was_full_quality:
+            end_full_quality(trigger + " finished")
+
+
+@persistent
+def on_render_pre(self, _=None):
+    # the render may start before the debounce delay or playback is over, apply what is still waiting first
+    finish_generation_job()
+    if bpy.app.timers.is_registered(on_playback_timer):
+        bpy.app.timers.unregister(on_playback_timer)
+    trigger = take_deferred_regeneration()
+    if trigger is not None:
+        pending_triggers.add(trigger)
+    begin_full_quality("render")  # regenerates everything if it swaps the graphs
+    if has_pending_regeneration():
+        run_pending_regeneration(trigger="render")
+
+
+@persistent
+def on_render_finished(self, _=None):
+    # not render_post, which runs after every frame of an animation
+    end_full_quality("render finished")
+
+
+def format_render_farm_report(stats: GenerationStats) -> str:
+    results = [x[0] for x in stats.channels.values()]
+    return T("render_farm_report").format(rebuilt=results.count("REBUILT"), patched=results.count("PATCHED"),
+                                          unchanged=results.count("UNCHANGED"), duration=stats.duration)
+
+
+def enter_render_farm_mode(force: bool = False) -> GenerationStats:
+    # regenerate every channel once with the full graphs, then stop reacting to updates altogether.
+    # headless jobs can run this from --python-expr, or set MATERIAL_DECALS_RENDER_FARM to do it after loading
+    global suspended
+    suspended = False
+    cancel_generation_job()
+    cancel_pending_regeneration()
+    ensure_predefined_node_groups_exists()
+    rebuild_projector_registry()
+    set_full_quality(True)
+    generate_nodes(force=force, trigger="render farm")
+
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if on_depsgraph_update in handlers:
+        handlers.remove(on_depsgraph_update)
+    suspended = True
+
+    stats = get_last_run()
+    print("[material decals] " + format_render_farm_report(stats))
+    for channel, (result, nodes, links) in stats.channels.items():
+        print(f"[material decals]     {channel}: {result.lower()}, {nodes} nodes, {links} links")
+    return stats
+
+
+def exit_render_farm_mode():
+    global suspended
+    if not suspended:
+        return
+    suspended = False
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    end_full_quality("render farm mode finished")
+
+
+def is_render_farm_mode() -> bool:
+    return suspended
+
+
+class DECAL_OT_render_farm_mode(Operator):
+    bl_idname = "material_decals.render_farm_mode"
+    bl_label = T("render_farm_mode")
+    bl_description = T("render_farm_mode_desc")
+
+    force: bpy.props.BoolProperty(name=T("render_farm_force"), description=T("render_farm_force_desc"))
+
+    def execute(self, context):
+        stats = enter_render_farm_mode(self.force)
+        self.report({'INFO'}, format_render_farm_report(stats))
+
+        return {'FINISHED'}
+
+
+class DECAL_OT_exit_render_farm_mode(Operator):
+    bl_idname = "material_decals.exit_render_farm_mode"
+    bl_label = T("exit_render_farm_mode")
+
+    @classmethod
+    def poll(self, context):
+        return is_render_farm_mode()
+
+    def execute(self, context):
+        exit_render_farm_mode()
+
+        return {'FINISHED'}
+
+
+class DECAL_OT_regenerate(Operator):
+    bl_idname = "material_decals.regenerate"
+    bl_options = {'UNDO'}
+    bl_label = T("regenerate_now")
+
+    def execute(self, context):
+        ensure_predefined_node_groups_exists()
+        run_pending_regeneration(force=True, trigger="regenerate operator")
+
+        return {'FINISHED'}
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_post.append(on_load_post)
+    bpy.app.handlers.save_pre.append(on_save_pre)
+    bpy.app.handlers.undo_post.append(on_undo_redo)
+    bpy.app.handlers.redo_post.append(on_undo_redo)
+    bpy.app.handlers.render_pre.append(on_render_pre)
+    bpy.app.handlers.frame_change_pre.append(on_frame_change_pre)
+    bpy.app.handlers.frame_change_post.append(on_frame_change_post)
+    bpy.app.handlers.render_complete.append(on_render_finished)
+    bpy.app.handlers.render_cancel.append(on_render_finished)
+
+
+def unregister():
+    cancel_pending_regeneration()
+    if bpy.app.timers.is_registered(on_playback_timer):
+        bpy.app.timers.unregister(on_playback_timer)
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    bpy.app.handlers.load_post.remove(on_load_post)
+    bpy.app.handlers.save_pre.remove(on_save_pre)
+    bpy.app.handlers.undo_post.remove(on_undo_redo)
+    bpy.app.handlers.redo_post.remove(on_undo_redo)
+    bpy.app.handlers.render_pre.remove(on_render_pre)
+    bpy.app.handlers.frame_change_pre.remove(on_frame_change_pre)
+    bpy.app.handlers.frame_change_post.remove(on_frame_change_post)
+    bpy.app.handlers.render_complete.remove(on_render_finished)
+    bpy.app.handlers.render_cancel.remove(on_render_finished)
+
+
+classes = (
+    DECAL_OT_regenerate,
+    DECAL_OT_render_farm_mode,
+    DECAL_OT_exit_render_farm_mode,
+)